@@ -1,8 +1,17 @@
-import json
-from datetime import datetime, timezone
+import hashlib
+import os
+from collections import namedtuple
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from xml.etree import ElementTree
 
 import feedparser
 
+from hermes_json import read_json, write_json
 from hermes_store import connect, import_legacy_signal_files, record_article, stats
 
 # List of RSS feeds
@@ -18,23 +27,89 @@ FEEDS = [
     "https://www.darkreading.com/rss.xml",
 ]
 
+# Feeds are fetched concurrently, so total fetch time tracks the slowest feed.
+FETCH_TIMEOUT_SECONDS = 20
+USER_AGENT = "HermesRelay/1.0 (+https://github.com/r0cstar09/hermes-relay)"
+
+# Per-feed ETag/Last-Modified validators plus the parsed entries they describe.
+# A 304 reply reuses the cached entries and skips both the body and the parse.
+FEED_CACHE_DIR = Path(os.getenv("HERMES_FEED_CACHE_DIR", ".cache/feeds"))
+# A feed already fetched during today's (UTC) run is not downloaded again, so a
+# rerun after a crash resumes from the cache. HERMES_FEED_REFRESH=1 overrides.
+FEED_REFRESH = os.getenv("HERMES_FEED_REFRESH", "").strip() == "1"
+
+# Feed summaries arrive as HTML with inline styles and tracking pixels; only a
+# few sentences of plain text are useful to the scoring prompt.
+SUMMARY_MAX_CHARS = 400
+
+
+def run_date_from_env():
+    """HERMES_RUN_DATE as YYYY-MM-DD, else today's UTC date; exits on a malformed value."""
+    value = os.getenv("HERMES_RUN_DATE", "").strip()
+    if not value:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise SystemExit(f"HERMES_RUN_DATE must be a YYYY-MM-DD date, got {value!r}")
+
+
 # Output file
-TODAY = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+TODAY = run_date_from_env()
 OUTPUT_JSON = f"hermes_signal_{TODAY}.json"
 RUN_STARTED_AT = datetime.now(timezone.utc).isoformat(timespec="seconds")
 
+# One collected article; converted to a dict only when the signal JSON is written.
+Article = namedtuple(
+    "Article",
+    "title link published summary source_feed article_hash",
+    defaults=(None,),
+)
+
 # Holds current-run new items or selected unbriefed backlog items.
 all_items = []
 
 
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def clean_summary(summary, max_chars=SUMMARY_MAX_CHARS):
+    """Reduce an HTML feed summary to whitespace-normalized plain text."""
+    if not summary:
+        return ""
+    if "<" in summary or "&" in summary:
+        parser = _TextExtractor()
+        parser.feed(summary)
+        parser.close()
+        summary = " ".join(parser.parts)
+    return " ".join(summary.split())[:max_chars]
+
+
 def row_to_article(row):
-    return {
-        "title": row["title"],
-        "link": row["link"],
-        "published": row["published"] or "",
-        "summary": row["summary"] or "",
-        "source_feed": row["source_feed"] or "sqlite-backlog",
-    }
+    return Article(
+        title=row["title"],
+        link=row["link"],
+        published=row["published"] or "",
+        summary=clean_summary(row["summary"]),
+        source_feed=row["source_feed"] or "sqlite-backlog",
+        article_hash=row["article_hash"],
+    )
 
 
 def load_unbriefed_backlog(conn, *, since=None, limit=40):
@@ -54,7 +129,8 @@ def load_unbriefed_backlog(conn, *, since=None, limit=40):
     params.append(limit)
     rows = conn.execute(
         f"""
-        SELECT title, link, source_feed, published, summary, first_seen_at, last_seen_at
+        SELECT article_hash, title, link, source_feed, published, summary,
+               first_seen_at, last_seen_at
         FROM articles
         {where}
         ORDER BY last_seen_at DESC, first_seen_at DESC
@@ -79,52 +155,250 @@ def bootstrap_database():
     return conn
 
 
+def feed_cache_path(url):
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return FEED_CACHE_DIR / f"{digest}.json.gz"
+
+
+def load_feed_cache(url):
+    """Return the cached validators/entries for a feed, or None."""
+    try:
+        cache = read_json(feed_cache_path(url))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or not isinstance(cache.get("entries"), list):
+        return None
+    return cache
+
+
+def save_feed_cache(url, *, validators, entries):
+    path = feed_cache_path(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(
+        path,
+        {
+            "url": url,
+            "fetched_on": TODAY,
+            **validators,
+            "entries": [list(entry) for entry in entries],
+        },
+        indent=False,
+    )
+
+
+def fetch_feed(url, cache=None):
+    """Download one feed body as raw bytes for feedparser.
+
+    Returns (body, validators). body is None when the server answered
+    304 Not Modified to the cached ETag/Last-Modified validators.
+    """
+    headers = {"User-Agent": USER_AGENT}
+    if cache:
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            return response.read(), validators
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cache:
+            return None, None
+        raise
+
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+RSS_CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+
+def _node_text(node, tag):
+    child = node.find(tag)
+    if child is None:
+        return ""
+    return "".join(child.itertext()).strip()
+
+
+def _atom_link(entry):
+    links = entry.findall(f"{ATOM_NS}link")
+    for link in links:
+        if link.get("rel", "alternate") == "alternate" and link.get("href"):
+            return link.get("href")
+    return links[0].get("href", "") if links else ""
+
+
+def _parse_xml_entries(data):
+    """Fast path for well-formed RSS 2.0 and Atom feeds using the C XML parser.
+
+    Returns the same tuples as the feedparser path, or None when the body is
+    not one of those dialects (or not well-formed) and feedparser should take it.
+    """
+    try:
+        root = ElementTree.fromstring(data)
+    except ElementTree.ParseError:
+        return None
+
+    items = root.findall("./channel/item")
+    if items:
+        return [
+            (
+                _node_text(item, "title"),
+                _node_text(item, "link"),
+                _node_text(item, "pubDate") or _node_text(item, DC_DATE),
+                clean_summary(_node_text(item, "description") or _node_text(item, RSS_CONTENT_ENCODED)),
+            )
+            for item in items
+        ]
+
+    entries = root.findall(f"{ATOM_NS}entry")
+    if entries:
+        return [
+            (
+                _node_text(entry, f"{ATOM_NS}title"),
+                _atom_link(entry).strip(),
+                _node_text(entry, f"{ATOM_NS}published") or _node_text(entry, f"{ATOM_NS}updated"),
+                clean_summary(_node_text(entry, f"{ATOM_NS}summary") or _node_text(entry, f"{ATOM_NS}content")),
+            )
+            for entry in entries
+        ]
+    return None
+
+
+def _parse_bytes(data):
+    """Parse one feed body into (title, link, published, summary) tuples.
+
+    Only the fields the collector uses are kept, which is also what the feed
+    cache stores. feedparser's tolerant (and much slower) pure-Python parser
+    is only used when the fast path declines.
+    """
+    entries = _parse_xml_entries(data)
+    if entries is not None:
+        return entries
+
+    feed = feedparser.parse(data)
+    entries = []
+    append = entries.append
+    for item in feed.entries:
+        g = item.get
+        title = (g("title") or "").strip()
+        link = (g("link") or "").strip()
+        # The collector drops these anyway; skip them before cleaning the summary.
+        if not (title and link):
+            continue
+        append((title, link, g("published") or g("updated") or "", clean_summary(g("summary") or "")))
+    return entries
+
+
+def collect_entries(urls=FEEDS):
+    """Fetch and parse every feed, returning (url, entries) in feed order.
+
+    Feeds already fetched today are served from the cache. The rest download
+    concurrently in threads, and each body is parsed on this thread as soon
+    as it arrives, so parsing overlaps the slower downloads. The ElementTree
+    fast path takes a few milliseconds per feed, well under what starting a
+    process pool costs. Unchanged feeds (HTTP 304) reuse their cached entries.
+    A failing feed is reported and skipped without aborting the run.
+    """
+    if not urls:
+        return []
+    caches = {url: load_feed_cache(url) for url in urls}
+    entries_by_url = {}
+    to_fetch = []
+    for url in urls:
+        cache = caches[url]
+        if cache and cache.get("fetched_on") == TODAY and not FEED_REFRESH:
+            print(f"Already fetched today, reusing cache: {url}")
+            entries_by_url[url] = [tuple(entry) for entry in cache["entries"]]
+        else:
+            to_fetch.append(url)
+    if not to_fetch:
+        return [(url, entries_by_url[url]) for url in urls]
+
+    with ThreadPoolExecutor(max_workers=len(to_fetch)) as fetch_pool:
+        fetches = {fetch_pool.submit(fetch_feed, url, caches[url]): url for url in to_fetch}
+        for future in as_completed(fetches):
+            url = fetches[future]
+            try:
+                body, validators = future.result()
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+                continue
+            if body is None:
+                print(f"Not modified since last fetch: {url}")
+                cache = caches[url]
+                entries_by_url[url] = [tuple(entry) for entry in cache["entries"]]
+                try:
+                    save_feed_cache(
+                        url,
+                        validators={"etag": cache.get("etag"), "last_modified": cache.get("last_modified")},
+                        entries=entries_by_url[url],
+                    )
+                except OSError as e:
+                    print(f"Warning: could not cache {url}: {e}")
+                continue
+            print(f"Fetched: {url}")
+            try:
+                entries = _parse_bytes(body)
+            except Exception as e:
+                print(f"Error parsing {url}: {e}")
+                continue
+            entries_by_url[url] = entries
+            try:
+                save_feed_cache(url, validators=validators, entries=entries)
+            except OSError as e:
+                print(f"Warning: could not cache {url}: {e}")
+
+    return [(url, entries_by_url[url]) for url in urls if url in entries_by_url]
+
+
 def fetch_and_parse():
     """Fetch all feeds, persist every seen item, and output only first-seen items."""
     conn = bootstrap_database()
     new_count = 0
     skipped_count = 0
+    # Feeds overlap (e.g. CISA alerts/advisories); a plain tuple set catches
+    # in-run repeats without hashing or touching SQLite.
+    seen_this_run = set()
 
     try:
-        for url in FEEDS:
-            print(f"Fetching: {url}")
+        for url, entries in collect_entries():
             try:
-                feed = feedparser.parse(url)
-                for item in feed.entries:
-                    title = item.get("title", "").strip()
-                    link = item.get("link", "").strip()
-                    published = item.get("published", item.get("updated", ""))
-                    summary = item.get("summary", "")
-
-                    if not title or not link:
+                for title, link, published, summary in entries:
+                    if not (title and link):
+                        continue
+
+                    key = (title, link)
+                    if key in seen_this_run:
+                        skipped_count += 1
                         continue
+                    seen_this_run.add(key)
 
-                    is_new, _ = record_article(
+                    is_new, uid = record_article(
                         conn,
                         title=title,
                         link=link,
                         source_feed=url,
                         published=published,
                         summary=summary,
+                        commit=False,
                     )
                     if not is_new:
                         skipped_count += 1
                         continue
 
                     new_count += 1
-                    all_items.append(
-                        {
-                            "title": title,
-                            "link": link,
-                            "published": published,
-                            "summary": summary,
-                            "source_feed": url,
-                        }
-                    )
+                    all_items.append(Article(title, link, published, summary, url, uid))
             except Exception as e:
-                print(f"Error fetching {url}: {e}")
+                print(f"Error processing {url}: {e}")
                 continue
 
+        # All feed entries are recorded in one transaction.
+        conn.commit()
         print(
             f"\nFound {new_count} first-seen article(s), "
             f"skipped {skipped_count} article(s) already in SQLite history"
@@ -156,8 +430,7 @@ def save_output():
         print("No first-seen articles to save. Output file will not be created.")
         return
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(all_items, f, indent=2, ensure_ascii=False)
+    write_json(OUTPUT_JSON, [article._asdict() for article in all_items])
     print(f"Saved {len(all_items)} first-seen item(s) to {OUTPUT_JSON}")
 
 
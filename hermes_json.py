@@ -0,0 +1,83 @@
+"""JSON encoding helpers shared by the Hermes Relay scripts.
+
+orjson (listed in requirements.txt) serializes in C and is used when it is
+installed. The stdlib json module is the fallback so the scripts and unit tests
+still run in a bare environment. Both paths emit UTF-8 without ASCII escaping,
+and files are replaced atomically so a crash never leaves a truncated output.
+Paths ending in ".gz" are gzip-compressed, which the internal caches use.
+Very large article arrays are decoded incrementally when the optional ijson
+package is installed.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - depends on the environment
+    ijson = None
+
+# Below this size the whole-buffer parse is faster than streaming.
+STREAM_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+
+def dumps(obj: Any, *, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 bytes, compact unless indent is requested."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        text = json.dumps(obj, indent=2, ensure_ascii=False)
+    else:
+        text = json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+    return text.encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse JSON; decode errors are json.JSONDecodeError on both paths."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _is_gzip(path: Path) -> bool:
+    return path.suffix == ".gz"
+
+
+def read_json(path: str | Path) -> Any:
+    path = Path(path)
+    data = path.read_bytes()
+    return loads(gzip.decompress(data) if _is_gzip(path) else data)
+
+
+def read_json_array(path: str | Path, *, stream_threshold: int = STREAM_THRESHOLD_BYTES) -> list:
+    """Read a top-level JSON array, streaming it with ijson when the file is large.
+
+    Streaming never holds the raw file in memory next to the parsed items.
+    """
+    path = Path(path)
+    if ijson is None or path.stat().st_size <= stream_threshold:
+        return read_json(path)
+    with (gzip.open(path, "rb") if _is_gzip(path) else path.open("rb")) as f:
+        return list(ijson.items(f, "item", use_float=True))
+
+
+def write_json(path: str | Path, obj: Any, *, indent: bool = True) -> None:
+    """Write JSON atomically: readers see the old file or the new one, never half."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    data = dumps(obj, indent=indent)
+    if _is_gzip(path):
+        # mtime=0 keeps the bytes stable for identical content
+        data = gzip.compress(data, mtime=0)
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
@@ -10,13 +10,15 @@ import glob
 import hashlib
 import json
 import os
+import re
 import sqlite3
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 DEFAULT_DB_PATH = "hermes_relay.db"
 SCHEMA_VERSION = 1
+_TITLE_WORD = re.compile(r"\w+")
 
 
 def utc_now() -> str:
@@ -81,6 +83,20 @@ def init_db(conn: sqlite3.Connection) -> None:
             email_sent INTEGER NOT NULL DEFAULT 0,
             created_at TEXT NOT NULL
         );
+
+        CREATE TABLE IF NOT EXISTS article_scores (
+            link TEXT PRIMARY KEY,
+            article_hash TEXT NOT NULL,
+            score REAL NOT NULL,
+            scored_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS briefing_blocks (
+            link TEXT PRIMARY KEY,
+            article_hash TEXT NOT NULL,
+            block TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
         """
     )
     conn.execute(
@@ -99,28 +115,30 @@ def record_article(
     published: str | None = None,
     summary: str | None = None,
     seen_at: str | None = None,
+    uid: str | None = None,
+    commit: bool = True,
 ) -> tuple[bool, str]:
     """Insert or update an article.
 
     Returns (is_new, article_hash). Dedupe uses both the historical title+link hash
     and a unique link index so minor title changes do not create repeat posts.
+    Pass uid when the article_hash is already known to skip recomputing it, and
+    commit=False to batch many records into the caller's transaction.
     """
 
     now = seen_at or utc_now()
-    uid = article_hash(title, link)
-    try:
-        conn.execute(
-            """
-            INSERT INTO articles (
-                article_hash, title, link, source_feed, published, summary,
-                first_seen_at, last_seen_at, times_seen
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
-            """,
-            (uid, title, link, source_feed, published, summary, now, now),
-        )
-        conn.commit()
-        return True, uid
-    except sqlite3.IntegrityError:
+    uid = uid or article_hash(title, link)
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO articles (
+            article_hash, title, link, source_feed, published, summary,
+            first_seen_at, last_seen_at, times_seen
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
+        """,
+        (uid, title, link, source_feed, published, summary, now, now),
+    )
+    is_new = cur.rowcount == 1
+    if not is_new:
         conn.execute(
             """
             UPDATE articles
@@ -136,8 +154,9 @@ def record_article(
             """,
             (now, source_feed, published, summary, uid, link),
         )
+    if commit:
         conn.commit()
-        return False, uid
+    return is_new, uid
 
 
 def article_exists(conn: sqlite3.Connection, *, title: str, link: str) -> bool:
@@ -178,6 +197,8 @@ def import_legacy_signal_files(conn: sqlite3.Connection, pattern: str = "hermes_
                 source_feed=article.get("source_feed") or f"legacy:{file_path}",
                 published=article.get("published"),
                 summary=article.get("summary"),
+                uid=article.get("article_hash"),
+                commit=False,
             )
             if is_new:
                 imported += 1
@@ -195,7 +216,8 @@ def mark_articles_used(conn: sqlite3.Connection, articles: list[dict[str, Any]])
         link = str(article.get("link", "")).strip()
         if not title or not link:
             continue
-        uid = article_hash(title, link)
+        # Signal files carry the hash computed when the article was recorded.
+        uid = article.get("article_hash") or article_hash(title, link)
         conn.execute(
             "UPDATE articles SET used_in_briefing = 1 WHERE article_hash = ? OR link = ?",
             (uid, link),
@@ -203,6 +225,166 @@ def mark_articles_used(conn: sqlite3.Connection, articles: list[dict[str, Any]])
     conn.commit()
 
 
+def _article_key(article: dict[str, Any]) -> tuple[str, str] | None:
+    title = str(article.get("title", "")).strip()
+    link = str(article.get("link", "")).strip()
+    if not title or not link:
+        return None
+    return link, article.get("article_hash") or article_hash(title, link)
+
+
+def save_article_scores(conn: sqlite3.Connection, scores: list[tuple[dict[str, Any], float]]) -> None:
+    """Remember shortlist scores so reruns only score articles they have not seen."""
+
+    now = utc_now()
+    for article, score in scores:
+        key = _article_key(article)
+        if key is None:
+            continue
+        conn.execute(
+            "INSERT OR REPLACE INTO article_scores(link, article_hash, score, scored_at) VALUES (?, ?, ?, ?)",
+            (*key, float(score), now),
+        )
+    conn.commit()
+
+
+def load_article_scores(
+    conn: sqlite3.Connection,
+    articles: list[dict[str, Any]],
+    *,
+    max_age_hours: int = 24,
+) -> dict[str, float]:
+    """Return {link: score} for articles scored within max_age_hours under the same hash."""
+
+    wanted = dict(key for key in map(_article_key, articles) if key is not None)
+    links = list(wanted)
+    since = (datetime.now(timezone.utc) - timedelta(hours=max_age_hours)).isoformat(timespec="seconds")
+    found: dict[str, float] = {}
+    for start in range(0, len(links), 500):
+        batch = links[start : start + 500]
+        rows = conn.execute(
+            f"SELECT link, article_hash, score FROM article_scores WHERE scored_at >= ? AND link IN ({','.join('?' * len(batch))})",
+            [since, *batch],
+        )
+        for link, uid, score in rows:
+            if wanted[link] == uid:
+                found[link] = float(score)
+    return found
+
+
+def save_briefing_blocks(conn: sqlite3.Connection, blocks: list[tuple[dict[str, Any], str]]) -> None:
+    """Remember the briefing text the LLM wrote for each (article, block) pair.
+
+    created_at keeps the time the link was first briefed, so a story that
+    keeps coming back still ages out of the near-duplicate window.
+    """
+
+    now = utc_now()
+    for article, block in blocks:
+        key = _article_key(article)
+        if key is None:
+            continue
+        conn.execute(
+            """
+            INSERT INTO briefing_blocks(link, article_hash, block, created_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(link) DO UPDATE SET article_hash = excluded.article_hash, block = excluded.block
+            """,
+            (*key, block, now),
+        )
+    conn.commit()
+
+
+def load_briefing_blocks(
+    conn: sqlite3.Connection,
+    articles: list[dict[str, Any]],
+    *,
+    since: str | None = None,
+    until: str | None = None,
+) -> dict[str, str]:
+    """Return {link: block} for articles that already have a briefing block.
+
+    A block only counts when the stored title+link hash still matches, so a
+    retitled story is briefed again. since/until (ISO timestamps) limit the
+    result to blocks first written in [since, until).
+    """
+
+    wanted = dict(key for key in map(_article_key, articles) if key is not None)
+    links = list(wanted)
+    window, window_params = "", []
+    if since is not None:
+        window += " AND created_at >= ?"
+        window_params.append(since)
+    if until is not None:
+        window += " AND created_at < ?"
+        window_params.append(until)
+    found: dict[str, str] = {}
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(links), 500):
+        batch = links[start : start + 500]
+        rows = conn.execute(
+            f"SELECT link, article_hash, block FROM briefing_blocks WHERE link IN ({','.join('?' * len(batch))}){window}",
+            [*batch, *window_params],
+        )
+        for link, uid, block in rows:
+            if wanted[link] == uid:
+                found[link] = block
+    return found
+
+
+def title_similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the lowercased words of two titles, 0.0-1.0."""
+    words_a = set(_TITLE_WORD.findall(a.lower()))
+    words_b = set(_TITLE_WORD.findall(b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def load_briefed_stories(
+    conn: sqlite3.Connection,
+    articles: list[dict[str, Any]],
+    *,
+    since: str,
+    until: str,
+    threshold: float = 0.9,
+) -> dict[str, str]:
+    """Return {link: prior_title} for articles whose story was briefed in [since, until).
+
+    A story counts as briefed when its link already has a block, or when a
+    block was written for an almost identical title (a syndicated copy under
+    a new link): the closest prior title must score at least threshold.
+    """
+
+    prior = conn.execute(
+        """
+        SELECT COALESCE(articles.title, ''), briefing_blocks.link
+        FROM briefing_blocks LEFT JOIN articles ON articles.link = briefing_blocks.link
+        WHERE briefing_blocks.created_at >= ? AND briefing_blocks.created_at < ?
+        """,
+        (since, until),
+    ).fetchall()
+    found: dict[str, str] = {}
+    if not prior:
+        return found
+    prior_titles = {link: title for title, link in prior}
+    for article in articles:
+        key = _article_key(article)
+        if key is None:
+            continue
+        if key[0] in prior_titles:
+            found[key[0]] = prior_titles[key[0]] or str(article["title"]).strip()
+            continue
+        title = str(article["title"]).strip()
+        best, best_score = None, threshold
+        for prior_title, _ in prior:
+            score = title_similarity(title, prior_title)
+            if score >= best_score:
+                best, best_score = prior_title, score
+        if best is not None:
+            found[key[0]] = best
+    return found
+
+
 def record_briefing(
     conn: sqlite3.Connection,
     *,
@@ -242,10 +424,10 @@ def record_briefing(
 
 
 def stats(conn: sqlite3.Connection) -> dict[str, int]:
-    article_count = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
-    used_count = conn.execute(
-        "SELECT COUNT(*) FROM articles WHERE used_in_briefing = 1"
-    ).fetchone()[0]
+    # One pass over articles; this runs on every collector start.
+    article_count, used_count = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(used_in_briefing = 1), 0) FROM articles"
+    ).fetchone()
     briefing_count = conn.execute("SELECT COUNT(*) FROM briefings").fetchone()[0]
     return {
         "articles": int(article_count),
@@ -1,46 +1,117 @@
+import atexit
+import difflib
+import functools
+import hashlib
 import os
 import json
-import glob
-import smtplib
+import logging
 import re
-from datetime import date
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from html import escape
 from pathlib import Path
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from google import genai
-from google.genai import types
 
-from hermes_store import connect, mark_articles_used, record_briefing
+from hermes_json import dumps as dumps_json, loads as loads_json, read_json, read_json_array, write_json
+from hermes_store import (
+    connect,
+    load_article_scores,
+    load_briefing_blocks,
+    load_briefed_stories,
+    mark_articles_used,
+    record_briefing,
+    save_article_scores,
+    save_briefing_blocks,
+)
 
 # -----------------------------
 # CONFIG
 # -----------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO"
+log = logging.getLogger("hermes")
+
 GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1")
 if not GOOGLE_CLOUD_LOCATION or GOOGLE_CLOUD_LOCATION.strip() == "":
     GOOGLE_CLOUD_LOCATION = "us-central1"
-    print(
-        f"Warning: GOOGLE_CLOUD_LOCATION was empty, using default: {GOOGLE_CLOUD_LOCATION}"
+    log.warning(
+        f"GOOGLE_CLOUD_LOCATION was empty, using default: {GOOGLE_CLOUD_LOCATION}"
     )
 
 VERTEX_MODEL = os.getenv("VERTEX_MODEL", "gemini-2.5-flash")
 if not VERTEX_MODEL or VERTEX_MODEL.strip() == "":
     VERTEX_MODEL = "gemini-2.5-flash"
-    print(f"Warning: VERTEX_MODEL was empty, using default: {VERTEX_MODEL}")
+    log.warning(f"VERTEX_MODEL was empty, using default: {VERTEX_MODEL}")
 
 VERTEX_MODEL_RESOURCE = os.getenv("VERTEX_MODEL_RESOURCE", "").strip()
 MODEL_NAME = VERTEX_MODEL_RESOURCE or VERTEX_MODEL
+# The shortlist pass only ranks articles, so it can run on a cheaper model
+SCORING_MODEL_NAME = os.getenv("VERTEX_SCORING_MODEL", "").strip() or MODEL_NAME
 
 # Email configuration
 ICLOUD_EMAIL = os.getenv("ICLOUD_EMAIL")
 ICLOUD_PASSWORD = os.getenv("ICLOUD_PASSWORD")  # App-specific password
 EMAIL_RECIPIENT = os.getenv("EMAIL_RECIPIENT", ICLOUD_EMAIL)  # Default to sender if not set
+# Socket timeout for every SMTP operation, so a hung mail server fails the
+# send instead of hanging the run
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30") or 30)
 
 # Output directory structure: json_output/YYYY-MM-DD/hermes_llm_top3_YYYY-MM-DD.json
-today = date.today().isoformat()
+# Computed once per run so every filename, prompt, and JSON field agrees on the date.
+# HERMES_RUN_DATE (YYYY-MM-DD) pins it, for replaying a past day or a run that
+# crosses midnight.
+_RUN_DATE = os.getenv("HERMES_RUN_DATE", "").strip()
+try:
+    TODAY = date.fromisoformat(_RUN_DATE) if _RUN_DATE else date.today()
+except ValueError:
+    raise EnvironmentError(f"HERMES_RUN_DATE must be a YYYY-MM-DD date, got {_RUN_DATE!r}") from None
+today = TODAY.isoformat()
+TODAY_HUMAN = TODAY.strftime('%B %d, %Y')
 OUTPUT_DIR = Path("json_output") / today
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
 OUTPUT_FILE = OUTPUT_DIR / f"hermes_llm_top3_{today}.json"
+# A failed LLM call is recorded here, never in OUTPUT_FILE, so the next run
+# does not mistake the error for a finished briefing
+ERROR_FILE = OUTPUT_DIR / f"hermes_llm_error_{today}.json"
+# LLM results keyed by article-set hash, reused by reruns within the TTL
+LLM_CACHE_DIR = Path("json_output") / ".cache"
+LLM_CACHE_TTL_HOURS = 24
+
+# Articles published longer ago than this are not sent to the LLM. Entries
+# without a parseable date are kept.
+MAX_ARTICLE_AGE = timedelta(days=2)
+# Smallest signal file that can contain an article; "[]" is 2 bytes
+MIN_SIGNAL_BYTES = 10
+
+# Large days are shortlisted first: each chunk of SCORING_CHUNK_SIZE articles is
+# scored by its own (parallel) LLM call, then the best SHORTLIST_PER_CHUNK per
+# chunk (counted across the whole day, not within each chunk) go into the full
+# briefing prompt. Bigger chunks mean fewer requests against the RPM quota.
+SCORING_CHUNK_SIZE = max(1, int(os.getenv("HERMES_SCORING_CHUNK_SIZE", "15") or 15))
+SHORTLIST_PER_CHUNK = 3
+# Scoring calls in flight at once; extra chunks queue behind them
+SCORING_MAX_WORKERS = max(1, int(os.getenv("HERMES_SCORING_CONCURRENCY", "10") or 10))
+# Article blocks in the final briefing
+BRIEFING_TOP_N = 3
+# A story briefed on one of the previous days is not briefed again, even when
+# another outlet's copy arrives under a new link
+BRIEFED_STORY_DAYS = 7
+# Ceiling on shortlisted rows, so a huge backlog day cannot grow the single
+# streamed briefing call without bound
+SHORTLIST_MAX = max(BRIEFING_TOP_N, int(os.getenv("HERMES_SHORTLIST_MAX", "30") or 30))
+
+# Vertex calls retry 429/5xx with exponential backoff, and request starts are
+# spaced so parallel shortlist calls stay under the project's RPM quota.
+LLM_MAX_ATTEMPTS = 5
+LLM_RETRY_BASE_SECONDS = 1.0
+LLM_RETRY_MAX_SECONDS = 60.0
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+VERTEX_MAX_RPM = int(os.getenv("VERTEX_MAX_RPM", "60") or 0)
+# Per-request deadline so a stalled connection raises (and is retried) instead of
+# hanging the run; this covers reading a whole streamed briefing.
+VERTEX_TIMEOUT_SECONDS = float(os.getenv("VERTEX_TIMEOUT_SECONDS", "300") or 300)
 
 # -----------------------------
 # VALIDATION
@@ -56,52 +127,148 @@ if not MODEL_NAME or MODEL_NAME.strip() == "":
         "Model configuration is empty. Set VERTEX_MODEL or VERTEX_MODEL_RESOURCE."
     )
 
-print(f"=== Configuration Loaded ===")
-print(f"  Google Cloud Project: '{GOOGLE_CLOUD_PROJECT}'")
-print(f"  Google Cloud Location: '{GOOGLE_CLOUD_LOCATION}'")
-print(f"  Vertex Model: '{MODEL_NAME}'")
-if VERTEX_MODEL_RESOURCE:
-    print("  Vertex Model Source: VERTEX_MODEL_RESOURCE override")
-else:
-    print("  Vertex Model Source: VERTEX_MODEL default")
-print(f"============================")
-
-client = genai.Client(
-    vertexai=True,
-    project=GOOGLE_CLOUD_PROJECT,
-    location=GOOGLE_CLOUD_LOCATION,
-)
+
+def _known_log_level(name):
+    # logging.getLevelNamesMapping() is Python 3.11+; the workflow runs 3.10
+    if hasattr(logging, "getLevelNamesMapping"):
+        return name in logging.getLevelNamesMapping()
+    return isinstance(logging.getLevelName(name), int)
+
+
+def configure_logging():
+    """Plain messages on stdout, matching the print output of the other scripts.
+
+    An unknown LOG_LEVEL falls back to INFO instead of aborting the run.
+    """
+    level = LOG_LEVEL if _known_log_level(LOG_LEVEL) else "INFO"
+    logging.basicConfig(stream=sys.stdout, level=level, format="%(message)s")
+    if level != LOG_LEVEL:
+        log.warning(f"unknown LOG_LEVEL {LOG_LEVEL!r}; using INFO.")
+
+    log.debug(f"=== Configuration Loaded ===")
+    log.debug(f"  Google Cloud Project: '{GOOGLE_CLOUD_PROJECT}'")
+    log.debug(f"  Google Cloud Location: '{GOOGLE_CLOUD_LOCATION}'")
+    log.debug(f"  Vertex Model: '{MODEL_NAME}'")
+    log.debug(f"  Scoring Model: '{SCORING_MODEL_NAME}'")
+    if VERTEX_MODEL_RESOURCE:
+        log.debug("  Vertex Model Source: VERTEX_MODEL_RESOURCE override")
+    else:
+        log.debug("  Vertex Model Source: VERTEX_MODEL default")
+    log.debug(f"============================")
+
+
+# The genai SDK is the slowest import by far. It is loaded with the client on
+# the first LLM call, so runs that only resend an existing briefing skip it.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            from google.genai import types
+
+            _client = genai.Client(
+                vertexai=True,
+                project=GOOGLE_CLOUD_PROJECT,
+                location=GOOGLE_CLOUD_LOCATION,
+                http_options=types.HttpOptions(timeout=int(VERTEX_TIMEOUT_SECONDS * 1000)),
+            )
+    return _client
+
+
+def prewarm_client():
+    """Import the SDK and build the client on a background thread.
+
+    Errors are left for the first real call, which raises them normally.
+    """
+    def warm():
+        try:
+            get_client()
+        except Exception as e:
+            log.debug(f"Vertex client prewarm failed ({type(e).__name__}: {e})")
+
+    threading.Thread(target=warm, daemon=True).start()
 
 # -----------------------------
 # HELPERS
 # -----------------------------
-def load_articles():
-    """Load articles from today's file (new articles only)."""
+def load_articles(articles=None):
+    """Load articles from today's file (new articles only).
+
+    Pass today's already-parsed signal file to skip reading it again.
+    """
     # Look for today's specific file first
     today_file = f"hermes_signal_{today}.json"
     
-    if not Path(today_file).exists():
+    if articles is not None:
+        file_to_load = today_file
+    elif not Path(today_file).exists():
         # Fallback: get the latest file if today's doesn't exist
-        files = sorted(glob.glob("hermes_signal_*.json"), reverse=True)
-        if not files:
+        # File names embed YYYY-MM-DD, so the max name is the newest file.
+        latest_file = max(Path(".").glob("hermes_signal_*.json"), key=lambda p: p.name, default=None)
+        if latest_file is None:
             raise FileNotFoundError(f"No hermes_signal_*.json files found. Expected today's file: {today_file}")
-        latest_file = files[0]
-        print(f"Warning: Today's file ({today_file}) not found. Using latest file: {latest_file}")
+        log.warning(f"Today's file ({today_file}) not found. Using latest file: {latest_file}")
         file_to_load = latest_file
     else:
         file_to_load = today_file
-        print(f"Loading new articles from today's file: {file_to_load}")
+        log.info(f"Loading new articles from today's file: {file_to_load}")
     
-    with open(file_to_load, "r", encoding="utf-8") as f:
-        articles = json.load(f)
+    if articles is None:
+        articles = read_json_array(file_to_load)
     
     if not articles:
         raise ValueError(f"No articles found in {file_to_load}. The file may be empty.")
     
-    print(f"Loaded {len(articles)} new article(s) from today")
+    articles = filter_recent_articles(articles)
+    log.info(f"Loaded {len(articles)} new article(s) from today")
     return articles
 
 
+def parse_published(value):
+    """Parse RSS (RFC 2822) or Atom (ISO 8601) dates; None if unparseable."""
+    if not value:
+        return None
+    try:
+        published = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            published = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
+
+def filter_recent_articles(articles, now=None):
+    """Drop articles older than MAX_ARTICLE_AGE before they reach the prompt.
+
+    Age is measured from ``now``, which defaults to the run date: the current
+    time, or the end of TODAY when HERMES_RUN_DATE names an earlier day. If
+    nothing is recent (e.g. a backlog-only day), all articles are kept so the
+    briefing still runs.
+    """
+    if now is None:
+        _, day_end = _run_day_bounds()
+        now = min(datetime.now(timezone.utc), datetime.fromisoformat(day_end))
+    cutoff = now - MAX_ARTICLE_AGE
+    recent = []
+    for article in articles:
+        published = parse_published(article.get("published"))
+        if published is None or published >= cutoff:
+            recent.append(article)
+    if not recent:
+        log.warning(f"no article is newer than {MAX_ARTICLE_AGE.days} day(s); keeping all {len(articles)}.")
+        return articles
+    if len(recent) < len(articles):
+        log.info(f"Dropped {len(articles) - len(recent)} article(s) older than {MAX_ARTICLE_AGE.days} day(s)")
+    return recent
+
+
 # Lens of the day: applied to Article Summary and Briefing. Rotates by day of year.
 LENSES = [
     {
@@ -139,6 +306,7 @@ LENSES = [
 ]
 
 
+@functools.lru_cache(maxsize=16)
 def get_lens_for_date(d: date) -> tuple[str, str]:
     """Return (lens_name, lens_description) for the given date. Deterministic by day of year."""
     idx = (d.toordinal() % len(LENSES))
@@ -162,17 +330,54 @@ ARTICLE_ANGLES = [
 ]
 
 
-def build_prompt(articles, lens_name: str, lens_description: str):
-    angles_list = "\n".join(f'- "{a}"' for a in ARTICLE_ANGLES)
-    return f"""
-You are a senior cybersecurity analyst advising executives.
+# The briefing matches its picks back by title, so only the scoring prompt,
+# whose reply is keyed by row, sends the "i" index.
+BRIEFING_ROW_KEYS = "t = exact title, s = summary"
+ARTICLE_ROW_KEYS = "i = index, " + BRIEFING_ROW_KEYS
 
-Today's lens (optional nudge): "{lens_name}". {lens_description}
+
+# Older signal files predate the collector's summary cap, so the prompt applies
+# the same bound.
+PROMPT_SUMMARY_MAX_CHARS = 400
+
+
+def prompt_summary(article):
+    """Whitespace-collapsed, length-capped summary; "" when it adds nothing."""
+    summary = " ".join((article.get("summary") or "").split())
+    if summary == " ".join((article.get("title") or "").split()):
+        return ""
+    if len(summary) > PROMPT_SUMMARY_MAX_CHARS:
+        summary = summary[:PROMPT_SUMMARY_MAX_CHARS].rsplit(" ", 1)[0] + "…"
+    return summary
+
+
+def articles_prompt_json(articles, *, indexed=True):
+    """Compact prompt rows: only the fields the model needs, no indentation.
+
+    "s" is left out of rows whose summary is empty or repeats the title, and
+    "i" when indexed is False.
+    """
+    rows = []
+    for i, a in enumerate(articles):
+        row = {"i": i, "t": a.get("title", "")} if indexed else {"t": a.get("title", "")}
+        summary = prompt_summary(a)
+        if summary:
+            row["s"] = summary
+        rows.append(row)
+    return dumps_json(rows).decode("utf-8")
+
+
+# The briefing prompt is assembled once. Everything that changes per run
+# (date, lens, articles) goes in the tail, so the long instruction prefix is
+# byte-identical across days and Vertex can serve it from its prefix cache.
+_ANGLES_LIST = "\n".join(f'- "{a}"' for a in ARTICLE_ANGLES)
+_PROMPT_PREFIX = """
+You are a senior cybersecurity analyst advising executives.
 
 Task:
-- You are analyzing NEW articles from today ({today}). Score each from 1–10, select the top 3.
+- You are analyzing NEW articles from today (date given below). Score each from 1–10, select the top 3.
 - For each article you MUST make a judgment call: which aspect of this story is most important? Pick ONE angle from the list below and write the entire article block through that angle.
-- Prefer different angles for each of the 3 articles when it makes sense (so the briefing has variety). You may use today's lens or any angle from the list.
+- Prefer different angles for each of the 3 articles when it makes sense (so the briefing has variety). You may use today's lens (given below) or any angle from the list.
 
 For each article, use this EXACT format (use "---" to separate each article):
 
@@ -184,7 +389,7 @@ Key Takeaways:
 
 Angle for this story:
 [Pick exactly ONE from this list and write it on the next line. This is your judgment of what matters most for this story. Then write everything below through this angle.]
-{angles_list}
+""" + _ANGLES_LIST + """
 
 One-Line Board Take:
 [One line, under 15 words, through the angle you chose. Board-level so-what.]
@@ -207,15 +412,36 @@ Briefing - Variant B:
 [Repeat for article 3 — choose an angle, ideally different from articles 1 and 2 when appropriate]
 
 IMPORTANT:
-- Use the exact article title/headline as in the articles list below.
+- Use the exact article title/headline ("t") as in the articles list below.
 - For each article output "Angle for this story:" then the exact angle text from the list. Then write One-Line Board Take, Article Summary, Briefing - Variant A, and Briefing - Variant B through that angle.
 - Vary the chosen angle across the three articles when it fits the stories.
+"""
+_PROMPT_TAIL = """
+Today: {today}
+Today's lens (optional nudge): "{lens_name}". {lens_description}
 
-Articles:
-{json.dumps(articles, indent=2)}
+Articles (""" + BRIEFING_ROW_KEYS + """):
+{articles_json}
 """
 
 
+_PARTIAL_BRIEFING_NOTE = """
+Only {top_n} article block(s) are needed this time: write up exactly {top_n}, not 3, and never invent articles that are not in the list.
+"""
+
+
+def build_prompt(articles, lens_name: str, lens_description: str, top_n: int = BRIEFING_TOP_N):
+    prompt = _PROMPT_PREFIX + _PROMPT_TAIL.format(
+        lens_name=lens_name,
+        lens_description=lens_description,
+        today=today,
+        articles_json=articles_prompt_json(articles, indexed=False),
+    )
+    if top_n < BRIEFING_TOP_N:
+        prompt += _PARTIAL_BRIEFING_NOTE.format(top_n=top_n)
+    return prompt
+
+
 def extract_response_text(response):
     """Safely extract text from Vertex response."""
     if getattr(response, "text", None):
@@ -234,87 +460,343 @@ def extract_response_text(response):
     return ""
 
 
-def call_llm(prompt):
-    print(f"=== Vertex AI Configuration ===")
-    print(f"Project: {GOOGLE_CLOUD_PROJECT}")
-    print(f"Location: {GOOGLE_CLOUD_LOCATION}")
-    print(f"Model: {MODEL_NAME}")
-    print(f"===============================")
+BRIEFING_SYSTEM_INSTRUCTION = (
+    "You are a senior cybersecurity practitioner writing for LinkedIn. "
+    "Your audience is security leaders, practitioners, and technical managers. "
+    "You write in a calm, confident, practical tone with an executive-technical style. "
+    "You explain why things matter and what you would do next based on experience, not theory. "
+    "You avoid bullet points, lists, headings, and generic advice. "
+    "You end with a subtle forward-looking insight, not a question."
+)
+
+SHORTLIST_SYSTEM_INSTRUCTION = (
+    "You are a senior cybersecurity analyst triaging news for executives. "
+    "You answer with JSON only."
+)
+
+
+class RateLimiter:
+    """Space request starts evenly so concurrent callers share one RPM budget."""
+
+    def __init__(self, max_per_minute):
+        self.interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+llm_rate_limiter = RateLimiter(VERTEX_MAX_RPM)
 
+
+def transport_errors():
+    """Connection/timeout exception types, including google-genai's httpx ones."""
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=1,
-                system_instruction=(
-                    "You are a senior cybersecurity practitioner writing for LinkedIn. "
-                    "Your audience is security leaders, practitioners, and technical managers. "
-                    "You write in a calm, confident, practical tone with an executive-technical style. "
-                    "You explain why things matter and what you would do next based on experience, not theory. "
-                    "You avoid bullet points, lists, headings, and generic advice. "
-                    "You end with a subtle forward-looking insight, not a question."
-                ),
-            ),
+        import httpx
+    except ImportError:  # pragma: no cover - depends on the environment
+        return (ConnectionError, TimeoutError)
+    return (ConnectionError, TimeoutError, httpx.TransportError)
+
+
+def is_retryable_llm_error(error):
+    code = getattr(error, "code", None)
+    return code in RETRYABLE_STATUS_CODES or isinstance(error, transport_errors())
+
+
+def llm_retry_delay(error, attempt):
+    """Seconds to wait before retry number attempt (0-based); honors Retry-After."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        retry_after = None
+    if retry_after is not None and retry_after >= 0:
+        return min(retry_after, LLM_RETRY_MAX_SECONDS)
+    return min(LLM_RETRY_BASE_SECONDS * 2 ** attempt, LLM_RETRY_MAX_SECONDS)
+
+
+def _stream_text(model, config, prompt, on_text=None):
+    """Consume a streamed completion, handing each text delta to on_text."""
+    parts = []
+    for chunk in get_client().models.generate_content_stream(
+        model=model,
+        contents=prompt,
+        config=config,
+    ):
+        delta = extract_response_text(chunk)
+        if delta:
+            parts.append(delta)
+            if on_text:
+                on_text(delta)
+    return "".join(parts)
+
+
+def generate_text(
+    prompt,
+    *,
+    system_instruction=BRIEFING_SYSTEM_INSTRUCTION,
+    temperature=1,
+    stream=False,
+    on_text=None,
+    response_mime_type=None,
+    model=None,
+):
+    """Run one Vertex generation and return its text; raises on failure.
+
+    With stream=True the completion is read as it is generated. A retried
+    stream starts over, so on_text may see a partial attempt's deltas first.
+    """
+    from google.genai import types
+
+    config = types.GenerateContentConfig(
+        temperature=temperature,
+        system_instruction=system_instruction,
+        response_mime_type=response_mime_type,
+    )
+    model = model or MODEL_NAME
+    for attempt in range(LLM_MAX_ATTEMPTS):
+        llm_rate_limiter.acquire()
+        try:
+            if stream:
+                text = _stream_text(model, config, prompt, on_text)
+            else:
+                response = get_client().models.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=config,
+                )
+                text = extract_response_text(response)
+            break
+        except Exception as e:
+            if attempt + 1 >= LLM_MAX_ATTEMPTS or not is_retryable_llm_error(e):
+                raise
+            delay = llm_retry_delay(e, attempt)
+            log.warning(f"Vertex request failed ({type(e).__name__}: {e}); retrying in {delay:.1f}s...")
+            time.sleep(delay)
+    if not text:
+        raise ValueError("Vertex response did not contain text output.")
+    return text
+
+
+def call_llm(prompt, on_text=None):
+    log.debug(f"=== Vertex AI Configuration ===")
+    log.debug(f"Project: {GOOGLE_CLOUD_PROJECT}")
+    log.debug(f"Location: {GOOGLE_CLOUD_LOCATION}")
+    log.debug(f"Model: {MODEL_NAME}")
+    log.debug(f"===============================")
+
+    try:
+        return generate_text(prompt, stream=True, on_text=on_text)
+    except Exception as e:
+        log.error(f"LLM request failed!")
+        log.error(f"Error type: {type(e).__name__}")
+        log.error(f"Error details: {e}")
+        log.error(f"\nDebugging info:")
+        log.error(f"  - Project: {GOOGLE_CLOUD_PROJECT}")
+        log.error(f"  - Location: {GOOGLE_CLOUD_LOCATION}")
+        log.error(f"  - Model: {MODEL_NAME}")
+
+        write_json(
+            ERROR_FILE,
+            {
+                "error": "LLM request failed",
+                "error_type": type(e).__name__,
+                "response": str(e),
+                "project": GOOGLE_CLOUD_PROJECT,
+                "location": GOOGLE_CLOUD_LOCATION,
+                "model": MODEL_NAME,
+            },
+        )
+        sys.exit(1)
+
+
+def build_shortlist_prompt(chunk):
+    return f"""Score each cybersecurity news article below from 1-10 for how much a security executive needs to know about it today.
+
+Return ONLY a JSON object of the form {{"scores": {{"<i>": score, ...}}}} with one entry for every "i" value.
+
+Articles ({ARTICLE_ROW_KEYS}):
+{articles_prompt_json(chunk)}
+"""
+
+
+def parse_shortlist(text, chunk_size):
+    """Return {chunk index: score} for the valid entries of a scoring reply."""
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    data = loads_json(cleaned)
+    raw = data.get("scores", {}) if isinstance(data, dict) else {}
+    scores = {}
+    for key, value in raw.items() if isinstance(raw, dict) else ():
+        try:
+            index = int(key)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < chunk_size and isinstance(value, (int, float)) and not isinstance(value, bool):
+            scores[index] = float(value)
+    return scores
+
+
+def score_chunk(chunk):
+    """Scores for one chunk's articles, or None if the scoring call fails."""
+    try:
+        text = generate_text(
+            build_shortlist_prompt(chunk),
+            system_instruction=SHORTLIST_SYSTEM_INSTRUCTION,
+            temperature=0,
+            response_mime_type="application/json",
+            model=SCORING_MODEL_NAME,
         )
-        text = extract_response_text(response)
-        if not text:
-            raise ValueError("Vertex response did not contain text output.")
-        return text
+        return parse_shortlist(text, len(chunk))
     except Exception as e:
-        print(f"\n❌ LLM request failed!")
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error details: {e}")
-        print(f"\nDebugging info:")
-        print(f"  - Project: {GOOGLE_CLOUD_PROJECT}")
-        print(f"  - Location: {GOOGLE_CLOUD_LOCATION}")
-        print(f"  - Model: {MODEL_NAME}")
-
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "error": "LLM request failed",
-                    "error_type": type(e).__name__,
-                    "response": str(e),
-                    "project": GOOGLE_CLOUD_PROJECT,
-                    "location": GOOGLE_CLOUD_LOCATION,
-                    "model": MODEL_NAME,
-                },
-                f,
-                indent=2,
-            )
+        log.warning(f"shortlist scoring failed for a chunk ({type(e).__name__}: {e}); keeping it whole.")
+        return None
 
-        import sys
 
-        sys.exit(1)
+def select_shortlist(chunks, chunk_scores, limit):
+    """Pick the limit best-scored articles overall, in their original order.
+
+    Chunks whose scoring call failed (None) are kept whole so nothing from
+    them is silently dropped.
+    """
+    ranked = []
+    kept = []
+    for chunk_number, (chunk, scores) in enumerate(zip(chunks, chunk_scores)):
+        if scores is None:
+            kept.extend((chunk_number, i) for i in range(len(chunk)))
+            continue
+        ranked.extend((-score, chunk_number, i) for i, score in scores.items())
+    ranked.sort()
+    kept.extend((chunk_number, i) for _, chunk_number, i in ranked[:limit])
+    return [chunks[chunk_number][i] for chunk_number, i in sorted(kept)]
+
+
+def score_articles(articles):
+    """Score articles in chunks; returns (chunks, chunk_scores).
+
+    Scores from earlier runs (same title and link, last 24h) are reused, so
+    a rerun only scores the articles that are new since then. A chunk whose
+    scoring call failed has None for its scores.
+    """
+    with connect() as conn:
+        known = load_article_scores(conn, articles)
+    scored = [article for article in articles if str(article.get("link", "")).strip() in known]
+    to_score = [article for article in articles if str(article.get("link", "")).strip() not in known]
+    chunks = [to_score[i:i + SCORING_CHUNK_SIZE] for i in range(0, len(to_score), SCORING_CHUNK_SIZE)]
+    if scored:
+        log.info(f"Reusing earlier scores for {len(scored)} article(s)")
+    chunk_scores = []
+    if chunks:
+        log.info(f"Shortlisting {len(to_score)} article(s) across {len(chunks)} parallel scoring call(s)...")
+        with ThreadPoolExecutor(max_workers=min(len(chunks), SCORING_MAX_WORKERS)) as pool:
+            chunk_scores = list(pool.map(score_chunk, chunks))
+        with connect() as conn:
+            save_article_scores(conn, [
+                (chunk[i], score)
+                for chunk, scores in zip(chunks, chunk_scores) if scores is not None
+                for i, score in scores.items()
+            ])
+    # Previously scored articles take part in the ranking as one more chunk
+    if scored:
+        chunks.append(scored)
+        chunk_scores.append({i: known[str(article.get("link", "")).strip()] for i, article in enumerate(scored)})
+    return chunks, chunk_scores
+
+
+def shortlist_articles(articles):
+    """Shrink large article lists to the day's best-scored articles."""
+    if len(articles) <= SCORING_CHUNK_SIZE:
+        return articles
+    chunks, chunk_scores = score_articles(articles)
+    limit = min(SHORTLIST_PER_CHUNK * -(-len(articles) // SCORING_CHUNK_SIZE), SHORTLIST_MAX)
+    shortlisted = select_shortlist(chunks, chunk_scores, limit)
+    # Back to the signal file's order
+    position = {id(article): i for i, article in enumerate(articles)}
+    shortlisted.sort(key=lambda article: position[id(article)])
+    log.info(f"Shortlisted {len(shortlisted)} article(s) for the briefing prompt")
+    return shortlisted or articles
+
+
+def leading_articles(chunks, chunk_scores, n=BRIEFING_TOP_N):
+    """The n best-scored articles; chunks that failed to score are left out."""
+    scored = [i for i, scores in enumerate(chunk_scores) if scores is not None]
+    return select_shortlist([chunks[i] for i in scored], [chunk_scores[i] for i in scored], n)
+
+
+# Smallest difflib ratio for a reworded headline to count as an article's title
+HEADLINE_MATCH_CUTOFF = 0.7
+
+
+_NON_WORD = re.compile(r"\W+")
+
+
+def _normalize_title(value):
+    return _NON_WORD.sub(" ", value).strip().lower()
+
+
+class HeadlineIndex:
+    """Title lookups for matching LLM headlines back to article links.
+
+    Exact, case-insensitive and punctuation-insensitive matches are dict
+    lookups. Only headlines that miss all three fall back to a substring
+    scan, then to difflib (HEADLINE_MATCH_CUTOFF) for headlines the LLM
+    reworded; difflib only answers when a single title clears the cutoff.
+    The first article wins ties, as with a linear search.
+    """
+
+    def __init__(self, articles):
+        self.exact = {}
+        self.lower = {}
+        self.normalized = {}
+        self.titles = []
+        for article in articles:
+            title = article["title"].strip()
+            link = article["link"]
+            self.exact.setdefault(title, link)
+            self.lower.setdefault(title.lower(), link)
+            self.normalized.setdefault(_normalize_title(title), link)
+            self.titles.append((title.lower(), link))
+
+    def resolve(self, headline):
+        """Return (link, certain); certain is False for substring or fuzzy matches."""
+        headline = headline.strip()
+        link = self.exact.get(headline)
+        if link is not None:
+            return link, True
+        headline_lower = headline.lower()
+        link = self.lower.get(headline_lower)
+        if link is not None:
+            return link, True
+        link = self.normalized.get(_normalize_title(headline))
+        if link is not None:
+            return link, True
+        # Partial match (headline contains article title or vice versa)
+        for title_lower, link in self.titles:
+            if title_lower in headline_lower or headline_lower in title_lower:
+                return link, False
+        close = difflib.get_close_matches(headline_lower, self.lower, n=2, cutoff=HEADLINE_MATCH_CUTOFF)
+        if len(close) == 1:
+            return self.lower[close[0]], False
+        return None, False
+
+    def match(self, headline):
+        return self.resolve(headline)[0]
 
 
 def match_headline_to_article(headline, articles):
     """Match a headline from LLM response to the original article to get the link."""
-    # Try exact match first
-    for article in articles:
-        if article["title"].strip() == headline.strip():
-            return article["link"]
-    
-    # Try case-insensitive match
-    for article in articles:
-        if article["title"].strip().lower() == headline.strip().lower():
-            return article["link"]
-    
-    # Try partial match (headline contains article title or vice versa)
-    for article in articles:
-        title_lower = article["title"].strip().lower()
-        headline_lower = headline.strip().lower()
-        if title_lower in headline_lower or headline_lower in title_lower:
-            return article["link"]
-    
-    return None
+    return HeadlineIndex(articles).match(headline)
 
 
-def format_email_html(llm_response, articles, lens_name=None):
-    """Convert LLM markdown response to HTML email with article links."""
-    lens_line = f'<p><strong>Today\'s lens:</strong> {lens_name}</p>\n            ' if lens_name else ""
-    html_content = f"""
+# Static shell of the briefing email. Doubled braces are literal CSS braces.
+_HTML_HEADER = """
     <html>
     <head>
         <style>
@@ -342,212 +824,557 @@ def format_email_html(llm_response, articles, lens_name=None):
     <body>
         <div class="container">
             <h1>🔒 Daily Cybersecurity Briefing</h1>
-            <p><strong>Date:</strong> {date.today().strftime('%B %d, %Y')}</p>
+            <p><strong>Date:</strong> {date}</p>
             {lens_line}
     """
-    
-    # Split response into sections by "---" (on its own line)
-    # Handle both "\n---\n" and "\n---" patterns
-    sections = re.split(r'\n---\s*\n', llm_response)
-    if len(sections) == 1:
-        # Try alternative splitting
-        sections = re.split(r'\n---\n', llm_response)
-    
-    article_count = 0
-    for section in sections:
-        if not section.strip():
-            continue
-        
-        # Try multiple headline patterns
-        headline = None
-        
-        # Pattern 1: Numbered format "1) Title" or "1. Title" at start
-        headline_match = re.search(r'^\d+[\)\.]\s*(.+?)(?:\n|$)', section, re.MULTILINE)
-        if headline_match:
-            headline = headline_match.group(1).strip()
-        else:
-            # Pattern 2: "Headline: **text**" or "Headline: text"
-            headline_match = re.search(r'Headline:\s*\*\*(.+?)\*\*|Headline:\s*(.+?)(?:\n|$)', section, re.IGNORECASE | re.DOTALL)
-            if headline_match:
-                headline = (headline_match.group(1) or headline_match.group(2)).strip()
-            else:
-                # Pattern 3: Bold text at start of section
-                headline_match = re.search(r'^\*\*(.+?)\*\*', section, re.MULTILINE)
-                if headline_match:
-                    headline = headline_match.group(1).strip()
-        
-        if headline:
-            headline = headline.strip('*').strip()
-            article_count += 1
-            
-            # Find matching article link
-            article_link = match_headline_to_article(headline, articles)
-            
-            # Start article div
-            if article_link:
-                html_content += f'<div class="article"><h2><a href="{article_link}" class="link" target="_blank">{headline}</a></h2>\n'
-            else:
-                html_content += f'<div class="article"><h2>{headline}</h2>\n'
-            
-            # Extract score - try multiple patterns
-            score = None
-            score_match = re.search(r'Score:\s*(\d+(?:\.\d+)?)\s*/?\s*10|Score:\s*\*\*(\d+(?:\.\d+)?)/10\*\*|\*\*(\d+(?:\.\d+)?)/10\*\*', section)
-            if score_match:
-                score = score_match.group(1) or score_match.group(2) or score_match.group(3)
-            
-            if score:
-                html_content += f'<div class="score">Score: {score}/10</div>\n'
-            
-            # Extract Key Takeaways bullets (limit to 2-3)
-            takeaways_match = re.search(r'Key Takeaways?:(.+?)(?=Angle for this story|One-Line Board Take|Article Summary|Board-Level Impact|Briefing|$)', section, re.IGNORECASE | re.DOTALL)
-            bullets = []
-            if takeaways_match:
-                takeaways_text = takeaways_match.group(1)
-                bullets = re.findall(r'[-•]\s*(.+?)(?=\n|$)', takeaways_text, re.MULTILINE)
-            else:
-                bullets_match = re.search(r'^[-•]\s*(.+?)$', section, re.MULTILINE)
-                if bullets_match:
-                    all_bullets = re.findall(r'^[-•]\s*(.+?)$', section, re.MULTILINE)
-                    bullets = [b.strip() for b in all_bullets[:3] if b.strip() and len(b.strip()) > 5]
-            
-            if bullets:
-                html_content += '<ul>\n'
-                for bullet in bullets[:3]:
-                    bullet = bullet.strip()
-                    if bullet and len(bullet) > 5:
-                        html_content += f'<li>{bullet}</li>\n'
-                html_content += '</ul>\n'
-            
-            # Extract Angle for this story (LLM's chosen angle for this article)
-            angle_match = re.search(r'Angle for this story[^:]*:\s*(?:\n\s*)?([^\n]+)', section, re.IGNORECASE)
-            if angle_match:
-                angle_line = angle_match.group(1).strip().replace('**', '').replace('*', '').strip()[:120]
-                if angle_line:
-                    html_content += f'<div class="angle-tag"><strong>Angle for this story:</strong> {angle_line}</div>\n'
-            
-            # Extract One-Line Board Take (single line, under 15 words)
-            one_liner_match = re.search(r'One-Line Board Take[^:]*:\s*([^\n]+)', section, re.IGNORECASE)
-            if one_liner_match:
-                one_liner = one_liner_match.group(1).strip().replace('**', '').replace('*', '').strip()
-                if one_liner and len(one_liner) < 200:
-                    html_content += f'<div class="board-one-liner"><strong>One-line board take:</strong> {one_liner}</div>\n'
-            
-            # Extract Article Summary section (stop at Briefing - Variant A)
-            summary_match = re.search(r'Article Summary:(.+?)(?=Briefing - Variant A|Briefing - Variant B|Variant A|Variant B|$)', section, re.IGNORECASE | re.DOTALL)
-            if not summary_match:
-                summary_match = re.search(r'Board-Level Impact:(.+?)(?=Briefing - Variant A|Briefing - Variant B|Variant A|Variant B|$)', section, re.IGNORECASE | re.DOTALL)
-            if summary_match:
-                summary_text = summary_match.group(1).strip()
-                summary_text_html = summary_text.replace('\n', '<br>')
-                summary_text_html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', summary_text_html)
-                html_content += f'''
+
+_HTML_FOOTER = """
+            <div class="footer">
+                <p>Generated by Hermes Relay - Your daily cybersecurity intelligence briefing</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+# Multi-line fragments of an article block, filled in by _render_section.
+_SUMMARY_BLOCK = '''
                 <div class="article-summary">
                     <strong>Article Summary:</strong><br>
-                    {summary_text_html}
+                    {summary}
                 </div>
                 '''
-            
-            # Extract Briefing Variant A and Variant B (LinkedIn-ready paragraphs)
-            variant_a_text = None
-            variant_b_text = None
-            variant_a_match = re.search(r'Briefing - Variant A[^:]*:\s*(.+?)(?=Briefing - Variant B|Variant B[^:]*:|$)', section, re.IGNORECASE | re.DOTALL)
-            if variant_a_match:
-                variant_a_text = variant_a_match.group(1).strip()
-            variant_b_match = re.search(r'Briefing - Variant B[^:]*:\s*(.+?)(?=\n---|\Z)', section, re.IGNORECASE | re.DOTALL)
-            if variant_b_match:
-                variant_b_text = variant_b_match.group(1).strip()
-            # Fallback: legacy single "Briefing Paragraph" if present
-            if not variant_a_text and not variant_b_text:
-                legacy_match = re.search(r'Briefing Paragraph[^:]*:\s*(.+?)(?=\n---|\Z)', section, re.IGNORECASE | re.DOTALL)
-                if legacy_match:
-                    variant_a_text = legacy_match.group(1).strip()
-            for label, text in [("Variant A (lead with so-what)", variant_a_text), ("Variant B (lead with concrete detail)", variant_b_text)]:
-                if text:
-                    clean = text.replace('**', '').replace('*', '').strip()
-                    if len(clean) > 50:
-                        clean_html = clean.replace('\n', '<br>')
-                        html_content += f'''
+
+_VARIANT_BLOCK = '''
                 <div class="briefing-paragraph briefing-variant">
                     <h3>📱 {label} — LinkedIn-ready</h3>
-                    <div class="briefing-text">{clean_html}</div>
+                    <div class="briefing-text">{text}</div>
                 </div>
                 '''
-            
-            html_content += '</div>\n'
-    
-    # Debug: print how many articles were found
-    if article_count == 0:
-        print(f"Warning: No articles found in response. Response length: {len(llm_response)}")
-        print(f"First 500 chars: {llm_response[:500]}")
-    
-    html_content += """
-            <div class="footer">
-                <p>Generated by Hermes Relay - Your daily cybersecurity intelligence briefing</p>
-            </div>
-        </div>
-    </body>
-    </html>
+
+
+# Patterns for parsing the briefing text, compiled once at import time.
+_HEADLINE_NUM = re.compile(r'^\d+[\)\.]\s*(.+?)(?:\n|$)', re.MULTILINE)
+_HEADLINE_LABEL = re.compile(r'Headline:\s*\*\*(.+?)\*\*|Headline:\s*(.+?)(?:\n|$)', re.IGNORECASE | re.DOTALL)
+_HEADLINE_BOLD = re.compile(r'^\*\*(.+?)\*\*', re.MULTILINE)
+_TAKEAWAY_BULLET = re.compile(r'[-•]\s*(.+?)(?=\n|$)', re.MULTILINE)
+_BULLET = re.compile(r'^[-•]\s*(.+?)$', re.MULTILINE)
+_BOLD_MD = re.compile(r'\*\*(.+?)\*\*')
+
+
+_SCORE = re.compile(r'Score:\s*(\d+(?:\.\d+)?)\s*/?\s*10|Score:\s*\*\*(\d+(?:\.\d+)?)/10\*\*|\*\*(\d+(?:\.\d+)?)/10\*\*')
+
+# Labels are looked up with str.find on an ASCII-lowercased copy of the section
+# (same length as the original, so offsets line up). Each field ends at the
+# first of its own stop labels that follows it.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_TAKEAWAYS_STOPS = ("angle for this story", "one-line board take", "article summary", "board-level impact", "briefing")
+_SUMMARY_STOPS = ("briefing - variant a", "briefing - variant b", "variant a", "variant b")
+_VARIANT_A_STOPS = ("briefing - variant b", "variant b")
+_BLOCK_END_STOPS = ("\n---",)
+
+
+def _find_first(text, needles, start):
+    """Lowest index of any needle in text at or after start, else len(text)."""
+    end = len(text)
+    for needle in needles:
+        index = text.find(needle, start, end)
+        if index != -1:
+            end = index
+    return end
+
+
+def _after_colon(section, lower, label, stops=()):
+    """Text after label's next ':' up to the first stop label, or None."""
+    index = lower.find(label)
+    if index == -1:
+        return None
+    colon = lower.find(":", index + len(label))
+    if colon == -1:
+        return None
+    start = colon + 1
+    return section[start:_find_first(lower, stops, start)]
+
+
+def _md_to_html(text):
+    """Escape LLM text for HTML, then render **bold** and line breaks."""
+    return _BOLD_MD.sub(r'<strong>\1</strong>', escape(text, quote=False)).replace('\n', '<br>')
+
+
+def _stripped(text):
+    if text is None:
+        return None
+    return text.strip() or None
+
+
+def _first_line(text):
+    if text is None:
+        return None
+    return text.lstrip().split("\n", 1)[0] or None
+
+
+def _parse_section(section):
+    """Slice one article block into its labelled fields in a single scan.
+
+    Returns raw field text (None when a label is absent); formatting is left
+    to format_email_html.
+    """
+    lower = section.translate(_ASCII_LOWER)
+
+    score = None
+    match = _SCORE.search(section)
+    if match:
+        score = match.group(1) or match.group(2) or match.group(3)
+
+    takeaways = None
+    index = lower.find("key takeaway")
+    if index != -1:
+        start = index + len("key takeaway")
+        if lower.startswith("s:", start):
+            start += 2
+        elif lower.startswith(":", start):
+            start += 1
+        else:
+            start = -1
+        if start != -1:
+            end = _find_first(lower, _TAKEAWAYS_STOPS, start + 1)
+            takeaways = section[start:end]
+
+    summary = None
+    for label in ("article summary:", "board-level impact:"):
+        index = lower.find(label)
+        if index != -1:
+            start = index + len(label)
+            summary = section[start:_find_first(lower, _SUMMARY_STOPS, start)].strip()
+            if summary:
+                break
+            summary = None
+
+    return {
+        "score": score,
+        "takeaways": takeaways,
+        "angle": _first_line(_after_colon(section, lower, "angle for this story")),
+        "one_liner": _first_line(_after_colon(section, lower, "one-line board take")),
+        "summary": summary,
+        "variant_a": _stripped(_after_colon(section, lower, "briefing - variant a", _VARIANT_A_STOPS)),
+        "variant_b": _stripped(_after_colon(section, lower, "briefing - variant b", _BLOCK_END_STOPS)),
+        "legacy_briefing": _stripped(_after_colon(section, lower, "briefing paragraph", _BLOCK_END_STOPS)),
+    }
+
+
+def _section_headline(section):
+    """Return the article headline of one LLM block, or None."""
+    # Try multiple headline patterns
+    headline = None
+
+    # Pattern 1: Numbered format "1) Title" or "1. Title" at start
+    headline_match = _HEADLINE_NUM.search(section)
+    if headline_match:
+        headline = headline_match.group(1).strip()
+    else:
+        # Pattern 2: "Headline: **text**" or "Headline: text"
+        headline_match = _HEADLINE_LABEL.search(section)
+        if headline_match:
+            headline = (headline_match.group(1) or headline_match.group(2)).strip()
+        else:
+            # Pattern 3: Bold text at start of section
+            headline_match = _HEADLINE_BOLD.search(section)
+            if headline_match:
+                headline = headline_match.group(1).strip()
+
+    if not headline:
+        return None
+    return headline.strip('*').strip()
+
+
+def _render_section(section, headline, article_link, parts):
+    """Append one article block's HTML to parts."""
+    # Start article div; only web links are clickable, so a feed cannot
+    # smuggle a javascript: or data: URL into the email
+    if article_link and article_link.lower().startswith(("http://", "https://")):
+        parts.append(f'<div class="article"><h2><a href="{escape(article_link)}" class="link" target="_blank">{escape(headline, quote=False)}</a></h2>\n')
+    else:
+        parts.append(f'<div class="article"><h2>{escape(headline, quote=False)}</h2>\n')
+
+    fields = _parse_section(section)
+
+    score = fields["score"]
+    if score:
+        parts.append(f'<div class="score">Score: {score}/10</div>\n')
+
+    # Extract Key Takeaways bullets (limit to 2-3)
+    bullets = []
+    if fields["takeaways"] is not None:
+        bullets = _TAKEAWAY_BULLET.findall(fields["takeaways"])
+    else:
+        all_bullets = _BULLET.findall(section)
+        bullets = [b.strip() for b in all_bullets[:3] if b.strip() and len(b.strip()) > 5]
+
+    if bullets:
+        parts.append('<ul>\n')
+        for bullet in bullets[:3]:
+            bullet = bullet.strip()
+            if bullet and len(bullet) > 5:
+                parts.append(f'<li>{escape(bullet, quote=False)}</li>\n')
+        parts.append('</ul>\n')
+
+    # Angle for this story (LLM's chosen angle for this article)
+    if fields["angle"]:
+        angle_line = fields["angle"].strip().replace('**', '').replace('*', '').strip()[:120]
+        if angle_line:
+            parts.append(f'<div class="angle-tag"><strong>Angle for this story:</strong> {escape(angle_line, quote=False)}</div>\n')
+
+    # One-Line Board Take (single line, under 15 words)
+    if fields["one_liner"]:
+        one_liner = fields["one_liner"].strip().replace('**', '').replace('*', '').strip()
+        if one_liner and len(one_liner) < 200:
+            parts.append(f'<div class="board-one-liner"><strong>One-line board take:</strong> {escape(one_liner, quote=False)}</div>\n')
+
+    # Article Summary (or legacy Board-Level Impact), stopping at the variants
+    if fields["summary"] is not None:
+        summary_text_html = _md_to_html(fields["summary"])
+        parts.append(_SUMMARY_BLOCK.format(summary=summary_text_html))
+
+    # Briefing Variant A and Variant B (LinkedIn-ready paragraphs); the
+    # legacy single "Briefing Paragraph" fills in when neither is present
+    variant_a_text = fields["variant_a"]
+    variant_b_text = fields["variant_b"]
+    if not variant_a_text and not variant_b_text:
+        variant_a_text = fields["legacy_briefing"]
+    for label, text in [("Variant A (lead with so-what)", variant_a_text), ("Variant B (lead with concrete detail)", variant_b_text)]:
+        if text:
+            clean = text.replace('**', '').replace('*', '').strip()
+            if len(clean) > 50:
+                clean_html = _md_to_html(clean)
+                parts.append(_VARIANT_BLOCK.format(label=label, text=clean_html))
+
+    parts.append('</div>\n')
+
+
+_LINE_ENDS = ("\n", "\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
+
+
+class BriefingRenderer:
+    """Builds the briefing email while the LLM response is still streaming.
+
+    feed() takes text deltas; every article block is rendered as soon as the
+    "---" line that closes it arrives. finish() renders the last block and
+    returns the whole email. Lines split exactly as str.splitlines() would.
+    """
+
+    def __init__(self, articles, lens_name=None):
+        self.articles = articles
+        self.lens_name = lens_name
+        self._reset()
+
+    def _reset(self):
+        self.headline_index = HeadlineIndex(self.articles)
+        self.article_parts = []
+        self.article_count = 0
+        # (link, block text) for every block matched exactly to an article
+        self.blocks = []
+        self._received = []
+        self._pending = ""
+        self._lines = []
+
+    def feed(self, delta):
+        self._received.append(delta)
+        lines = (self._pending + delta).splitlines(keepends=True)
+        # Hold back an unterminated last line, and a lone "\r" that may be
+        # the first half of "\r\n"
+        if lines and (not lines[-1].endswith(_LINE_ENDS) or lines[-1].endswith("\r")):
+            self._pending = lines.pop()
+        else:
+            self._pending = ""
+        for line in lines:
+            self._add_line(line.splitlines()[0])
+
+    def _add_line(self, line):
+        if line.strip() == "---":
+            self._flush()
+        else:
+            self._lines.append(line)
+
+    def _flush(self):
+        section = "\n".join(self._lines)
+        self._lines = []
+        headline = _section_headline(section) if section.strip() else None
+        if not headline:
+            return
+        article_link, certain = self.headline_index.resolve(headline)
+        _render_section(section, headline, article_link, self.article_parts)
+        self.article_count += 1
+        # A block is only cached under a link its headline names for sure
+        if article_link and certain:
+            self.blocks.append((article_link, section.strip()))
+
+    def finish(self, full_text=None):
+        """Return the email HTML.
+
+        If full_text differs from what was fed (a retried stream replays from
+        the start), it is re-rendered from scratch.
+        """
+        received = "".join(self._received)
+        if full_text is not None and full_text != received:
+            self._reset()
+            self.feed(full_text)
+            received = full_text
+        for line in self._pending.splitlines():
+            self._add_line(line)
+        self._pending = ""
+        self._flush()
+
+        # Debug: log how many articles were found
+        if self.article_count == 0:
+            log.warning(f"No articles found in response. Response length: {len(received)}")
+            log.debug(f"First 500 chars: {received[:500]}")
+
+        lens_line = f'<p><strong>Today\'s lens:</strong> {escape(self.lens_name, quote=False)}</p>\n            ' if self.lens_name else ""
+        header = _HTML_HEADER.format(date=TODAY_HUMAN, lens_line=lens_line)
+        return "".join([header, *self.article_parts, _HTML_FOOTER])
+
+
+def format_email_html(llm_response, articles, lens_name=None):
+    """Convert LLM markdown response to HTML email with article links."""
+    renderer = BriefingRenderer(articles, lens_name=lens_name)
+    renderer.feed(llm_response)
+    return renderer.finish()
+
+
+def _run_day_bounds():
+    """ISO timestamps (UTC) for the start of the run date and of the next day."""
+    start = datetime(TODAY.year, TODAY.month, TODAY.day, tzinfo=timezone.utc)
+    return start.isoformat(timespec="seconds"), (start + timedelta(days=1)).isoformat(timespec="seconds")
+
+
+def drop_briefed_stories(articles):
+    """Leave out articles whose story was briefed in the BRIEFED_STORY_DAYS before the run date.
+
+    That covers the same link and syndicated copies whose title shares
+    nearly all its words with a briefed one. Blocks written on the run date
+    itself belong to reruns and are handled by plan_briefing.
+    """
+    day_start, _ = _run_day_bounds()
+    window_start = (datetime.fromisoformat(day_start) - timedelta(days=BRIEFED_STORY_DAYS)).isoformat(timespec="seconds")
+    with connect() as conn:
+        briefed = load_briefed_stories(conn, articles, since=window_start, until=day_start)
+    kept = []
+    for article in articles:
+        prior_title = briefed.get(str(article.get("link", "")).strip())
+        if prior_title is None:
+            kept.append(article)
+        else:
+            log.info(f"Skipping already briefed story: {article.get('title', '')!r} (as {prior_title!r})")
+    return kept
+
+
+def plan_briefing(articles):
+    """Decide what the LLM still has to write; returns (reused_blocks, candidates, top_n).
+
+    Selection comes first: the day's top BRIEFING_TOP_N by shortlist score
+    are picked as if nothing were cached, and only those leaders reuse a
+    block an earlier run wrote on the same run date. Every other article
+    stays a candidate for the top_n blocks the LLM is asked for.
+    """
+    day_start, day_end = _run_day_bounds()
+    with connect() as conn:
+        blocks = load_briefing_blocks(conn, articles, since=day_start, until=day_end)
+    if not blocks:
+        leaders = []
+    elif len(articles) <= BRIEFING_TOP_N:
+        # Every article is briefed, so there is nothing to rank
+        leaders = articles
+    else:
+        leaders = leading_articles(*score_articles(articles))
+    reused, reused_links = [], set()
+    for article in leaders:
+        link = str(article.get("link", "")).strip()
+        if link in blocks:
+            reused.append(blocks[link])
+            reused_links.add(link)
+    fresh = [article for article in articles if str(article.get("link", "")).strip() not in reused_links]
+    slots = BRIEFING_TOP_N - len(reused)
+    # With no more candidates than open slots there is nothing to select:
+    # skip the scoring pass and brief them all. Scores saved above are reused.
+    candidates = fresh if len(fresh) <= slots else shortlist_articles(fresh)
+    return reused, candidates, min(slots, len(candidates))
+
+
+def remember_briefing_blocks(articles, blocks):
+    by_link = {article.get("link"): article for article in articles}
+    with connect() as conn:
+        save_briefing_blocks(conn, [(by_link[link], block) for link, block in blocks if link in by_link])
+
+
+class SMTPClient:
+    """Lazily opened SMTP session that is reused across sends.
+
+    The TLS handshake and login happen on the first send only, or earlier
+    in the background via warm_up(). A session the server has dropped is
+    detected with NOOP (or by the send failing) and is reopened once.
     """
-    
-    return html_content
 
+    def __init__(self, host, port, username, password, timeout=SMTP_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._server = None
+        self._warmup = None
+        self._lock = threading.Lock()
 
-def send_email(html_content, subject="Daily Cybersecurity Briefing"):
-    """Send email via iCloud SMTP."""
+    def _connect(self):
+        import smtplib
+
+        log.info("Connecting to SMTP server...")
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if log.isEnabledFor(logging.DEBUG):
+                server.set_debuglevel(1)  # Dump the SMTP conversation
+            log.debug("Starting TLS...")
+            server.starttls()
+            log.debug(f"Attempting login with email: {self.username}")
+            server.login(self.username, self.password)
+        except BaseException:
+            server.close()
+            raise
+        log.info("Login successful!")
+        return server
+
+    def warm_up(self):
+        """Start connecting on a background thread, e.g. while the LLM streams.
+
+        A failed warm-up is only logged; the first send connects again and
+        reports the error as usual.
+        """
+        if self._server is None and self._warmup is None:
+            self._warmup = threading.Thread(target=self._warm_up, daemon=True)
+            self._warmup.start()
+
+    def _warm_up(self):
+        try:
+            server = self._connect()
+        except Exception as e:
+            log.debug(f"SMTP warm-up failed ({type(e).__name__}: {e}); will connect at send time")
+            return
+        with self._lock:
+            if self._warmup is threading.current_thread():
+                self._server = server
+                return
+        # _finish_warm_up stopped waiting for this session; nothing will use it
+        server.close()
+
+    def _finish_warm_up(self):
+        """Wait up to timeout for the warm-up; a slower one is abandoned."""
+        warmup = self._warmup
+        if warmup is None:
+            return
+        warmup.join(self.timeout)
+        with self._lock:
+            self._warmup = None
+        if warmup.is_alive():
+            log.debug("SMTP warm-up is still connecting; will connect at send time")
+
+    @property
+    def server(self):
+        self._finish_warm_up()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def is_alive(self):
+        if self._server is None:
+            return False
+        import smtplib
+
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send_message(self, msg):
+        import smtplib
+
+        self._finish_warm_up()
+        if self._server is not None and not self.is_alive():
+            self.quit()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.quit()
+            self.server.send_message(msg)
+
+    def quit(self):
+        self._finish_warm_up()
+        server, self._server = self._server, None
+        if server is None:
+            return
+        import smtplib
+
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+
+smtp_client = SMTPClient("smtp.mail.me.com", 587, ICLOUD_EMAIL, ICLOUD_PASSWORD)
+atexit.register(smtp_client.quit)
+
+
+def send_email(html_content, subject="Daily Cybersecurity Briefing", smtp=None):
+    """Send email via iCloud SMTP.
+
+    smtp is anything with send_message(): an SMTPClient or an already open
+    smtplib.SMTP a caller wants to reuse. It defaults to the shared session.
+    """
     if not ICLOUD_EMAIL or not ICLOUD_PASSWORD:
-        print("Email credentials not configured. Skipping email send.")
-        print("Set ICLOUD_EMAIL and ICLOUD_PASSWORD environment variables to enable email.")
+        log.info("Email credentials not configured. Skipping email send.")
+        log.info("Set ICLOUD_EMAIL and ICLOUD_PASSWORD environment variables to enable email.")
         return False
     
+    # Imported here so runs that never send mail skip loading them
+    import smtplib
+    from email.message import EmailMessage
+
     try:
-        # Create message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"{subject} - {date.today().strftime('%B %d, %Y')}"
+        # Create message: plain-text fallback plus the HTML alternative
+        msg = EmailMessage()
+        msg['Subject'] = f"{subject} - {TODAY_HUMAN}"
         msg['From'] = ICLOUD_EMAIL
         msg['To'] = EMAIL_RECIPIENT
-        
-        # Create HTML part
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
+        msg.set_content("Today's Hermes Relay briefing needs an HTML-capable email client.")
+        msg.add_alternative(html_content, subtype='html')
         
         # Send email via iCloud SMTP
-        print(f"Sending email to {EMAIL_RECIPIENT}...")
-        print(f"Using SMTP server: smtp.mail.me.com:587")
-        print(f"Email address: {ICLOUD_EMAIL}")
-        print(f"Password length: {len(ICLOUD_PASSWORD) if ICLOUD_PASSWORD else 0} characters")
+        log.info(f"Sending email to {EMAIL_RECIPIENT}...")
+        smtp = smtp or smtp_client
+        if smtp is smtp_client:
+            log.debug(f"Using SMTP server: {smtp_client.host}:{smtp_client.port}")
+        log.debug(f"Email address: {ICLOUD_EMAIL}")
+        log.debug(f"Password length: {len(ICLOUD_PASSWORD) if ICLOUD_PASSWORD else 0} characters")
         
-        with smtplib.SMTP('smtp.mail.me.com', 587) as server:
-            print("Connecting to SMTP server...")
-            server.set_debuglevel(1)  # Enable debug output
-            print("Starting TLS...")
-            server.starttls()
-            print(f"Attempting login with email: {ICLOUD_EMAIL}")
-            server.login(ICLOUD_EMAIL, ICLOUD_PASSWORD)
-            print("Login successful! Sending message...")
-            server.send_message(msg)
+        smtp.send_message(msg)
         
-        print("Email sent successfully!")
+        log.info("Email sent successfully!")
         return True
     except smtplib.SMTPAuthenticationError as e:
-        print(f"❌ SMTP Authentication Failed!")
-        print(f"Error details: {e}")
-        print(f"\nTroubleshooting steps:")
-        print(f"1. Verify ICLOUD_EMAIL is correct: {ICLOUD_EMAIL}")
-        print(f"2. Verify ICLOUD_PASSWORD is an app-specific password (not your regular password)")
-        print(f"3. Check that 2FA is enabled on your Apple ID")
-        print(f"4. Generate a new app-specific password at: https://appleid.apple.com")
-        print(f"5. Make sure there are no extra spaces in your .env file")
+        log.error(f"SMTP Authentication Failed!")
+        log.error(f"Error details: {e}")
+        log.error(f"\nTroubleshooting steps:")
+        log.error(f"1. Verify ICLOUD_EMAIL is correct: {ICLOUD_EMAIL}")
+        log.error(f"2. Verify ICLOUD_PASSWORD is an app-specific password (not your regular password)")
+        log.error(f"3. Check that 2FA is enabled on your Apple ID")
+        log.error(f"4. Generate a new app-specific password at: https://appleid.apple.com")
+        log.error(f"5. Make sure there are no extra spaces in your .env file")
         return False
     except smtplib.SMTPException as e:
-        print(f"❌ SMTP Error: {e}")
-        print(f"Error code: {e.smtp_code if hasattr(e, 'smtp_code') else 'N/A'}")
-        print(f"Error message: {e.smtp_error if hasattr(e, 'smtp_error') else str(e)}")
+        log.error(f"SMTP Error: {e}")
+        log.error(f"Error code: {e.smtp_code if hasattr(e, 'smtp_code') else 'N/A'}")
+        log.error(f"Error message: {e.smtp_error if hasattr(e, 'smtp_error') else str(e)}")
         return False
     except Exception as e:
-        print(f"❌ Failed to send email: {type(e).__name__}: {e}")
-        import traceback
-        print(f"Full traceback:")
-        traceback.print_exc()
+        log.exception(f"Failed to send email: {type(e).__name__}: {e}")
         return False
 
 
@@ -576,43 +1403,146 @@ def persist_briefing_record(
             email_attempted=email_configured(),
             email_sent=email_sent,
         )
-    print(f"Persisted briefing metadata to SQLite row id {briefing_id}")
+    log.info(f"Persisted briefing metadata to SQLite row id {briefing_id}")
+
+
+# Changes whenever the briefing prompt is edited, so old results stop matching
+PROMPT_VERSION = hashlib.blake2b(
+    "".join([BRIEFING_SYSTEM_INSTRUCTION, _PROMPT_PREFIX, _PROMPT_TAIL, _PARTIAL_BRIEFING_NOTE]).encode("utf-8"),
+    digest_size=8,
+).hexdigest()
+
+
+def articles_content_hash(articles, lens_name, lens_description):
+    """Fingerprint of everything that shapes a briefing.
+
+    Covers the (title, link) pairs in any order, the lens, the prompt
+    version, the model and the run date, so a cached result is only reused
+    for the same day's prompt.
+    """
+    pairs = sorted((article.get("title", ""), article.get("link", "")) for article in articles)
+    key = [pairs, lens_name, lens_description, PROMPT_VERSION, MODEL_NAME, today]
+    return hashlib.blake2b(dumps_json(key), digest_size=16).hexdigest()
+
+
+def load_cached_briefing(content_hash):
+    """Today's saved briefing if it was generated from the same articles, else None."""
+    try:
+        data = read_json(OUTPUT_FILE)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if isinstance(data, dict) and data.get("content_hash") == content_hash and data.get("top_articles"):
+        return data
+    return None
+
+
+def _llm_cache_path(content_hash):
+    return LLM_CACHE_DIR / f"{content_hash}.json.gz"
+
+
+def load_recent_llm_result(content_hash):
+    """A briefing generated from the same articles within LLM_CACHE_TTL_HOURS, else None."""
+    path = _llm_cache_path(content_hash)
+    st = stat_or_none(path)
+    if st is None or time.time() - st.st_mtime > LLM_CACHE_TTL_HOURS * 3600:
+        return None
+    try:
+        data = read_json(path)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if isinstance(data, dict) and data.get("top_articles"):
+        return data
+    return None
+
+
+def save_llm_result(content_hash, lens_name, result):
+    """Store a fresh LLM result under its article-set hash, dropping expired entries."""
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - LLM_CACHE_TTL_HOURS * 3600
+    for old in LLM_CACHE_DIR.glob("*.json*"):
+        st = stat_or_none(old)
+        if st is not None and st.st_mtime < cutoff:
+            old.unlink(missing_ok=True)
+    write_json(_llm_cache_path(content_hash), {"lens": lens_name, "top_articles": result}, indent=False)
+
+
+def render_and_send(result, articles, html_file, lens_name=None, renderer=None):
+    """Render briefing text to HTML, save it, and email it; returns email_sent.
+
+    Pass the BriefingRenderer that was fed the stream to keep the blocks it
+    already rendered.
+    """
+    if renderer is not None:
+        html_email = renderer.finish(result)
+        remember_briefing_blocks(articles, renderer.blocks)
+    else:
+        html_email = format_email_html(result, articles, lens_name=lens_name)
+
+    # Save HTML to the same directory as JSON
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(html_email)
+    log.info(f"Saved HTML → {html_file}")
+    return send_email(html_email)
+
+
+def stat_or_none(path):
+    """os.stat result for path, or None if it does not exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
 
 
 # -----------------------------
 # MAIN
 # -----------------------------
 def main():
+    configure_logging()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)  # Create directory if it doesn't exist
     html_file = OUTPUT_DIR / f"hermes_briefing_{today}.html"
     signal_file = Path(f"hermes_signal_{today}.json")
     
+    # One stat per file answers both "does it exist" and "how new is it"
+    signal_st = stat_or_none(signal_file)
+    output_st = stat_or_none(OUTPUT_FILE)
+    html_st = stat_or_none(html_file)
+
+    # An email rendered after the signal file was last written is current:
+    # resend it without parsing the signal file or rendering anything
+    if signal_st is not None and html_st is not None and html_st.st_mtime >= signal_st.st_mtime:
+        log.info("HTML file is newer than today's signal file. Using existing HTML file...")
+        html_email = html_file.read_text(encoding="utf-8")
+        email_sent = send_email(html_email)
+        persist_briefing_record(
+            json_path=OUTPUT_FILE if output_st is not None else None,
+            html_path=html_file,
+            top_articles="existing HTML reused; output already up to date",
+            email_sent=email_sent,
+        )
+        log.info("Done! Existing HTML handled.")
+        return
+
     # First, check if today's signal file exists and has new articles
     has_new_articles = False
-    signal_file_time = 0
-    output_file_time = 0
+    signal_articles = None
     
-    if signal_file.exists():
-        signal_file_time = signal_file.stat().st_mtime
+    # A file this small can only hold an empty array, so it is not parsed
+    if signal_st is not None and signal_st.st_size >= MIN_SIGNAL_BYTES:
         try:
-            with open(signal_file, "r", encoding="utf-8") as f:
-                signal_articles = json.load(f)
-                if signal_articles and len(signal_articles) > 0:
-                    has_new_articles = True
-                    print(f"Found {len(signal_articles)} new article(s) in today's signal file")
+            signal_articles = read_json_array(signal_file)
+            if signal_articles and len(signal_articles) > 0:
+                has_new_articles = True
+                log.info(f"Found {len(signal_articles)} new article(s) in today's signal file")
         except (json.JSONDecodeError, FileNotFoundError):
-            print(f"Warning: Could not read {signal_file}")
-    
-    # Check if output files exist and get their modification time
-    if OUTPUT_FILE.exists():
-        output_file_time = OUTPUT_FILE.stat().st_mtime
+            log.warning(f"Could not read {signal_file}")
     
     # Determine if we need to regenerate
     should_regenerate = False
     
     if not has_new_articles:
-        print("No new articles found in today's signal file.")
-        if html_file.exists():
-            print("Using existing HTML file...")
+        log.info("No new articles found in today's signal file.")
+        if html_st is not None:
+            log.info("Using existing HTML file...")
             with open(html_file, "r", encoding="utf-8") as f:
                 html_email = f.read()
             email_sent = send_email(html_email)
@@ -621,91 +1551,137 @@ def main():
                 top_articles="existing HTML reused; no new articles",
                 email_sent=email_sent,
             )
-            print("Done! Existing HTML handled.")
+            log.info("Done! Existing HTML handled.")
             return
         else:
-            print("No HTML file exists and no new articles. Nothing to send.")
+            log.info("No HTML file exists and no new articles. Nothing to send.")
             return
     
     # If we have new articles, check if signal file is newer than output
     if has_new_articles:
-        if not OUTPUT_FILE.exists() or signal_file_time > output_file_time:
+        if output_st is None or signal_st.st_mtime > output_st.st_mtime:
             should_regenerate = True
-            print("Signal file is newer than output files. Regenerating summaries...")
+            log.info("Signal file is newer than output files. Regenerating summaries...")
         else:
-            print("Output files exist and are up to date. Using existing files...")
-            if html_file.exists():
+            log.info("Output files exist and are up to date. Using existing files...")
+            if html_st is not None:
                 with open(html_file, "r", encoding="utf-8") as f:
                     html_email = f.read()
                 email_sent = send_email(html_email)
                 persist_briefing_record(
-                    json_path=OUTPUT_FILE if OUTPUT_FILE.exists() else None,
+                    json_path=OUTPUT_FILE,
                     html_path=html_file,
                     top_articles="existing HTML reused; output already up to date",
                     email_sent=email_sent,
                 )
-                print("Done! Existing HTML handled.")
+                log.info("Done! Existing HTML handled.")
                 return
-            elif OUTPUT_FILE.exists():
+            else:
                 # Regenerate HTML from existing JSON
-                with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                articles = load_articles()
-                html_email = format_email_html(data["top_articles"], articles, lens_name=data.get("lens"))
-                with open(html_file, "w", encoding="utf-8") as f:
-                    f.write(html_email)
-                email_sent = send_email(html_email)
-                persist_briefing_record(
-                    lens_name=data.get("lens"),
-                    json_path=OUTPUT_FILE,
-                    html_path=html_file,
-                    top_articles=data.get("top_articles"),
-                    email_sent=email_sent,
-                )
-                print("Done! Regenerated HTML handled.")
-                return
+                try:
+                    data = read_json(OUTPUT_FILE)
+                except (OSError, json.JSONDecodeError):
+                    data = None
+                if isinstance(data, dict) and data.get("top_articles"):
+                    articles = load_articles(signal_articles)
+                    email_sent = render_and_send(data["top_articles"], articles, html_file, lens_name=data.get("lens"))
+                    persist_briefing_record(
+                        lens_name=data.get("lens"),
+                        json_path=OUTPUT_FILE,
+                        html_path=html_file,
+                        top_articles=data.get("top_articles"),
+                        email_sent=email_sent,
+                    )
+                    log.info("Done! Regenerated HTML handled.")
+                    return
+                # e.g. an error payload written by an older version
+                should_regenerate = True
+                log.warning(f"{OUTPUT_FILE} holds no briefing text. Regenerating summaries...")
     
     # Generate new summaries from today's new articles
     if should_regenerate:
-        print("Generating new summaries from today's new articles...")
-        articles = load_articles()
+        log.info("Generating new summaries from today's new articles...")
+        # Most regenerations reach the LLM; overlap the SDK import with the
+        # article loading and cache lookups below
+        prewarm_client()
+        loaded_articles = load_articles(signal_articles)
         
-        if not articles or len(articles) == 0:
-            print("No articles to process. Exiting.")
+        if not loaded_articles or len(loaded_articles) == 0:
+            log.info("No articles to process. Exiting.")
             return
-        
-        lens_name, lens_description = get_lens_for_date(date.today())
-        print(f"Today's lens: {lens_name}")
 
-        prompt = build_prompt(articles, lens_name, lens_description)
+        # Stories readers already got are dropped, not promoted; they are
+        # still marked used so the collector's backlog stops offering them
+        articles = drop_briefed_stories(loaded_articles)
+        if not articles:
+            log.info(f"Every article was already briefed in the last {BRIEFED_STORY_DAYS} days. Nothing new to send.")
+            with connect() as conn:
+                mark_articles_used(conn, loaded_articles)
+            return
+        
+        lens_name, lens_description = get_lens_for_date(TODAY)
+        log.info(f"Today's lens: {lens_name}")
 
-        print("Calling Vertex AI Gemini…")
-        result = call_llm(prompt)
+        content_hash = articles_content_hash(articles, lens_name, lens_description)
+        cached = load_cached_briefing(content_hash) if output_st is not None else None
+        renderer = None
+        if cached is not None:
+            # The signal file was rewritten with the same articles: reuse the
+            # saved briefing, and bump its mtime so the next run short-circuits
+            log.info("Articles unchanged since the saved briefing. Skipping the LLM call...")
+            lens_name = cached.get("lens") or lens_name
+            result = cached["top_articles"]
+            os.utime(OUTPUT_FILE)
+        else:
+            recent = load_recent_llm_result(content_hash)
+            if recent is not None:
+                log.info(f"Same articles were briefed within {LLM_CACHE_TTL_HOURS}h. Skipping the LLM call...")
+                lens_name = recent.get("lens") or lens_name
+                result = recent["top_articles"]
+            else:
+                # Article blocks are rendered while the rest is still streaming
+                renderer = BriefingRenderer(articles, lens_name=lens_name)
+                reused_blocks, candidates, top_n = plan_briefing(articles)
+                prefix = "".join(f"{block}\n\n---\n\n" for block in reused_blocks)
+                if top_n == 0:
+                    log.info(f"Reusing {len(reused_blocks)} article block(s) written earlier. Skipping the LLM call...")
+                    result = "\n\n---\n\n".join(reused_blocks)
+                else:
+                    if reused_blocks:
+                        log.info(f"Reusing {len(reused_blocks)} article block(s) written earlier; asking for {top_n} more")
+                    prompt = build_prompt(candidates, lens_name, lens_description, top_n=top_n)
+                    renderer.feed(prefix)
+                    if email_configured():
+                        # Overlap the TLS handshake and login with the stream
+                        smtp_client.warm_up()
+                    log.info("Calling Vertex AI Gemini…")
+                    result = prefix + call_llm(prompt, on_text=renderer.feed)
+                save_llm_result(content_hash, lens_name, result)
 
-        # Save JSON output (for backup/debugging)
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(
+            # Save JSON output (for backup/debugging)
+            write_json(
+                OUTPUT_FILE,
                 {
-                    "date": date.today().isoformat(),
+                    "date": today,
                     "lens": lens_name,
+                    "content_hash": content_hash,
                     "top_articles": result,
                 },
-                f,
-                indent=2,
             )
-        print(f"Saved output → {OUTPUT_FILE}")
+            log.info(f"Saved output → {OUTPUT_FILE}")
 
-        # Format as HTML email and send
-        html_email = format_email_html(result, articles, lens_name=lens_name)
-        
-        # Save HTML to the same directory as JSON
-        with open(html_file, "w", encoding="utf-8") as f:
-            f.write(html_email)
-        print(f"Saved HTML → {html_file}")
+        if cached is not None and html_st is not None:
+            with open(html_file, "r", encoding="utf-8") as f:
+                html_email = f.read()
+            # Mark it current too, so the next run resends it straight away
+            os.utime(html_file)
+            email_sent = send_email(html_email)
+        else:
+            # The in-memory result is rendered directly, never re-read from disk
+            email_sent = render_and_send(result, articles, html_file, lens_name=lens_name, renderer=renderer)
         
-        email_sent = send_email(html_email)
         with connect() as conn:
-            mark_articles_used(conn, articles)
+            mark_articles_used(conn, loaded_articles)
         persist_briefing_record(
             lens_name=lens_name,
             json_path=OUTPUT_FILE,
@@ -713,7 +1689,7 @@ def main():
             top_articles=result,
             email_sent=email_sent,
         )
-        print("Done! New summaries generated and persisted.")
+        log.info("Done! New summaries generated and persisted.")
 
 
 if __name__ == "__main__":
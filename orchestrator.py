@@ -1,6 +1,7 @@
 import os
 import subprocess
 import sys
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -12,22 +13,20 @@ def check_env():
         sys.exit(1)
 
 def run_script(script_name):
-    print(f"\nRunning {script_name}...")
-    result = subprocess.run(
-        [sys.executable, script_name],
-        capture_output=True,
-        text=True
-    )
+    print(f"\nRunning {script_name}...", flush=True)
+    # The child inherits our stdout/stderr and runs unbuffered (-u), so its
+    # progress shows up live instead of all at once when it exits
+    result = subprocess.run([sys.executable, "-u", script_name])
 
     if result.returncode != 0:
-        print("STDOUT:\n", result.stdout)
-        print("STDERR:\n", result.stderr)
+        print(f"{script_name} failed with exit code {result.returncode}")
         sys.exit(1)
 
-    print(result.stdout)
-
 def main():
     check_env()
+    # Both scripts name their files by date; pin it so a run that crosses
+    # midnight still reads the signal file it just wrote
+    os.environ.setdefault("HERMES_RUN_DATE", datetime.now(timezone.utc).strftime("%Y-%m-%d"))
     run_script("hermes-relay.py")
     run_script("llm_score_and_summarize.py")
     print("\nHermes Relay pipeline completed successfully.")
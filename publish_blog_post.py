@@ -11,6 +11,8 @@ from __future__ import annotations
 
 import argparse
 import base64
+import difflib
+import functools
 import json
 import os
 import re
@@ -21,6 +23,8 @@ from datetime import date
 from pathlib import Path
 from typing import Iterable
 
+from hermes_json import read_json
+
 
 DEFAULT_SITE_DIR = Path(os.getenv("OPPOSITE_OSIRIS_DIR", "/mnt/c/Users/antho/opposite-osiris"))
 DEFAULT_BLOG_DIR = Path("src/content/blog")
@@ -28,6 +32,18 @@ DEFAULT_VOICE_PROFILE = Path("prompts/tony_voice.md")
 DEFAULT_VERTEX_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "us-central1") or "us-central1"
 DEFAULT_IMAGE_MODEL = os.getenv("VERTEX_BLOG_IMAGE_MODEL")
 
+# Compiled once; the briefing parser and slugify run them per article block.
+_NON_SLUG = re.compile(r"[^a-z0-9]+")
+_DASH_RUN = re.compile(r"-+")
+_ISO_DATE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_BLOCK_SEPARATOR = re.compile(r"\n\s*---\s*\n")
+_NUMBERED_TITLE = re.compile(r"^\d+\)\s*(.+?)\s*$")
+_SCORE_LINE = re.compile(r"(?im)^Score:\s*(\d{1,2})\s*/\s*10")
+_SCORE_LINE_FULL = re.compile(r"(?im)^Score:.*$")
+_NON_WORD = re.compile(r"\W+")
+_FENCE_OPEN = re.compile(r"^```(?:markdown|md)?\s*", re.I)
+_FENCE_CLOSE = re.compile(r"\s*```$")
+
 
 @dataclass
 class ArticleBlock:
@@ -44,8 +60,8 @@ class ArticleBlock:
 
 def slugify(value: str, max_len: int = 72) -> str:
     value = value.lower()
-    value = re.sub(r"[^a-z0-9]+", "-", value)
-    value = re.sub(r"-+", "-", value).strip("-")
+    value = _NON_SLUG.sub("-", value)
+    value = _DASH_RUN.sub("-", value).strip("-")
     return (value[:max_len].rstrip("-") or "hermes-relay-briefing")
 
 
@@ -54,33 +70,36 @@ def yaml_quote(value: str) -> str:
 
 
 def load_json(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return read_json(path)
 
 
 def find_latest_briefing_json(base_dir: Path) -> Path:
-    files = sorted(base_dir.glob("json_output/*/hermes_llm_top3_*.json"), reverse=True)
-    if not files:
+    latest = max(base_dir.glob("json_output/*/hermes_llm_top3_*.json"), default=None)
+    if latest is None:
         raise FileNotFoundError("No json_output/*/hermes_llm_top3_*.json files found")
-    return files[0]
+    return latest
 
 
 def date_from_briefing_path(path: Path, data: dict) -> str:
     if data.get("date"):
         return str(data["date"])
-    match = re.search(r"(\d{4}-\d{2}-\d{2})", str(path))
+    match = _ISO_DATE.search(str(path))
     return match.group(1) if match else date.today().isoformat()
 
 
 def split_article_blocks(text: str) -> list[str]:
-    blocks = [b.strip() for b in re.split(r"\n\s*---\s*\n", text) if b.strip()]
+    blocks = [b.strip() for b in _BLOCK_SEPARATOR.split(text) if b.strip()]
     return blocks or [text.strip()]
 
 
+@functools.lru_cache(maxsize=None)
+def _section_pattern(label: str, stop_labels: tuple[str, ...]) -> re.Pattern[str]:
+    stops = "|".join(re.escape(s) for s in stop_labels)
+    return re.compile(rf"(?is){re.escape(label)}\s*:?\s*(.*?)(?=\n\s*(?:{stops})\s*:?|\Z)")
+
+
 def extract_section(block: str, label: str, stop_labels: Iterable[str]) -> str | None:
-    labels = [re.escape(label)] + [re.escape(s) for s in stop_labels]
-    pattern = rf"(?is){re.escape(label)}\s*:?\s*(.*?)(?=\n\s*(?:{'|'.join(labels[1:])})\s*:?|\Z)"
-    match = re.search(pattern, block)
+    match = _section_pattern(label, tuple(stop_labels)).search(block)
     if not match:
         return None
     value = match.group(1).strip()
@@ -92,7 +111,7 @@ def extract_title(block: str) -> str:
         line = line.strip()
         if not line:
             continue
-        match = re.match(r"^\d+\)\s*(.+?)\s*$", line)
+        match = _NUMBERED_TITLE.match(line)
         if match:
             return match.group(1).strip(" -*#")
         return line.strip(" -*#")
@@ -100,7 +119,7 @@ def extract_title(block: str) -> str:
 
 
 def extract_score(block: str) -> int | None:
-    match = re.search(r"(?im)^Score:\s*(\d{1,2})\s*/\s*10", block)
+    match = _SCORE_LINE.search(block)
     if not match:
         return None
     return int(match.group(1))
@@ -120,7 +139,7 @@ def extract_bullets(text: str | None) -> list[str]:
 
 
 def normalize_title(value: str) -> str:
-    return re.sub(r"\W+", " ", value).strip().lower()
+    return _NON_WORD.sub(" ", value).strip().lower()
 
 
 def find_source_url(title: str, signal_articles: list[dict]) -> str | None:
@@ -132,6 +151,15 @@ def find_source_url(title: str, signal_articles: list[dict]) -> str | None:
         article_title = normalize_title(str(article.get("title", "")))
         if article_title and (article_title in norm or norm in article_title):
             return article.get("link") or article.get("url")
+    # Last resort for headlines the LLM reworded
+    by_title: dict[str, dict] = {}
+    for article in signal_articles:
+        by_title.setdefault(normalize_title(str(article.get("title", ""))), article)
+    # Ambiguous when more than one title clears the cutoff
+    close = difflib.get_close_matches(norm, by_title, n=2, cutoff=0.7)
+    if len(close) == 1:
+        article = by_title[close[0]]
+        return article.get("link") or article.get("url")
     return None
 
 
@@ -160,7 +188,7 @@ def parse_articles(llm_text: str, signal_articles: list[dict]) -> list[ArticleBl
         variant_b = extract_section(raw, "Briefing - Variant B", stop_labels)
         if not summary:
             # Fallback for older briefing formats.
-            summary = re.sub(r"(?im)^Score:.*$", "", raw).strip()
+            summary = _SCORE_LINE_FULL.sub("", raw).strip()
         parsed.append(
             ArticleBlock(
                 title=title,
@@ -277,17 +305,31 @@ def _image_bytes_from_generated_image(generated) -> bytes | None:
     return None
 
 
+@functools.lru_cache(maxsize=None)
+def vertex_client(project: str, location: str):
+    """One Vertex client per project/location so the image and editor passes share its HTTP connection pool."""
+    from google import genai
+    from google.genai import types
+
+    timeout_ms = int(float(os.getenv("VERTEX_TIMEOUT_SECONDS", "300") or 300) * 1000)
+    return genai.Client(
+        vertexai=True,
+        project=project,
+        location=location,
+        http_options=types.HttpOptions(timeout=timeout_ms),
+    )
+
+
 def generate_hero_image_with_vertex(*, article: ArticleBlock, image_model: str, output_path: Path) -> str:
     project = os.getenv("GOOGLE_CLOUD_PROJECT")
     location = DEFAULT_VERTEX_LOCATION
     if not project:
         raise EnvironmentError("GOOGLE_CLOUD_PROJECT is required for the Vertex blog hero image pass")
 
-    from google import genai
     from google.genai import types
 
     prompt = build_hero_image_prompt(article)
-    client = genai.Client(vertexai=True, project=project, location=location)
+    client = vertex_client(project, location)
     print(f"Running Vertex blog hero image pass with model: {image_model}")
     response = client.models.generate_images(
         model=image_model,
@@ -373,13 +415,12 @@ def edit_markdown_with_vertex(markdown: str, *, editor_model: str, voice_profile
     if not voice_profile_path.exists():
         raise FileNotFoundError(f"Voice profile not found: {voice_profile_path}")
 
-    from google import genai
     from google.genai import types
 
     frontmatter, body = split_frontmatter(markdown)
     voice_profile = voice_profile_path.read_text(encoding="utf-8")
     prompt = build_editor_prompt(body=body, voice_profile=voice_profile, article=article)
-    client = genai.Client(vertexai=True, project=project, location=location)
+    client = vertex_client(project, location)
     response = None
     last_error: Exception | None = None
     for model in parse_model_fallbacks(editor_model):
@@ -409,8 +450,8 @@ def edit_markdown_with_vertex(markdown: str, *, editor_model: str, voice_profile
     edited_body = extract_response_text(response)
     if not edited_body:
         raise ValueError("Vertex blog editor response did not contain text output")
-    edited_body = re.sub(r"^```(?:markdown|md)?\s*", "", edited_body.strip(), flags=re.I)
-    edited_body = re.sub(r"\s*```$", "", edited_body.strip())
+    edited_body = _FENCE_OPEN.sub("", edited_body.strip())
+    edited_body = _FENCE_CLOSE.sub("", edited_body.strip())
     if article.source_url and article.source_url not in edited_body and article.source_url in body:
         print("Editor removed source URL; restoring source/footer from draft body.")
         for line in body.splitlines():
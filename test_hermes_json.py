@@ -0,0 +1,63 @@
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import hermes_json
+
+
+SAMPLE = [{"title": "Café breach — ünïcode", "link": "https://example.com/a", "n": 1}]
+
+
+class HermesJsonTests(unittest.TestCase):
+    def test_indented_output_matches_stdlib_pretty_print(self):
+        expected = json.dumps(SAMPLE, indent=2, ensure_ascii=False)
+        self.assertEqual(hermes_json.dumps(SAMPLE, indent=True).decode("utf-8"), expected)
+        with mock.patch.object(hermes_json, "orjson", None):
+            self.assertEqual(hermes_json.dumps(SAMPLE, indent=True).decode("utf-8"), expected)
+
+    def test_compact_round_trip_without_orjson(self):
+        with mock.patch.object(hermes_json, "orjson", None):
+            data = hermes_json.dumps(SAMPLE)
+            self.assertEqual(data, json.dumps(SAMPLE, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            self.assertEqual(hermes_json.loads(data), SAMPLE)
+
+    def test_read_write_json_and_decode_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "out.json"
+            hermes_json.write_json(path, SAMPLE)
+            self.assertEqual(hermes_json.read_json(path), SAMPLE)
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ["out.json"])
+            path.write_text("{not json", encoding="utf-8")
+            with self.assertRaises(json.JSONDecodeError):
+                hermes_json.read_json(path)
+
+    def test_gz_paths_are_compressed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "cache.json.gz"
+            hermes_json.write_json(path, SAMPLE, indent=False)
+            self.assertEqual(gzip.decompress(path.read_bytes()), hermes_json.dumps(SAMPLE))
+            self.assertEqual(hermes_json.read_json(path), SAMPLE)
+            self.assertEqual(hermes_json.read_json_array(path), SAMPLE)
+
+    def test_read_json_array_streams_only_above_threshold(self):
+        streamed = []
+
+        def fake_items(f, prefix, use_float=False):
+            streamed.append(prefix)
+            return iter(json.load(f))
+
+        fake_ijson = mock.Mock(items=fake_items)
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(hermes_json, "ijson", fake_ijson):
+            path = Path(tmp) / "signal.json"
+            hermes_json.write_json(path, SAMPLE)
+            self.assertEqual(hermes_json.read_json_array(path), SAMPLE)
+            self.assertEqual(streamed, [])
+            self.assertEqual(hermes_json.read_json_array(path, stream_threshold=0), SAMPLE)
+            self.assertEqual(streamed, ["item"])
+
+
+if __name__ == "__main__":
+    unittest.main()
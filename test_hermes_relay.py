@@ -1,9 +1,12 @@
 import importlib.util
+import json
+import os
 import sys
 import tempfile
 import types
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from hermes_store import connect, mark_articles_used, record_article
 
@@ -56,11 +59,155 @@ class HermesRelayCollectorTests(unittest.TestCase):
                     conn, since="2026-06-21T00:00:00+00:00", limit=10
                 )
 
-                self.assertEqual([item["title"] for item in backlog], ["Unused but still relevant"])
-                self.assertEqual(backlog[0]["source_feed"], "feed")
+                self.assertEqual([item.title for item in backlog], ["Unused but still relevant"])
+                self.assertEqual(backlog[0].source_feed, "feed")
+                self.assertEqual(len(backlog[0].article_hash), 64)
             finally:
                 conn.close()
 
+    def test_save_output_writes_article_dicts(self):
+        relay = load_relay_module()
+        with tempfile.TemporaryDirectory() as tmp:
+            relay.OUTPUT_JSON = str(Path(tmp) / "hermes_signal_test.json")
+            relay.all_items.append(
+                relay.Article("Title", "https://example.com/a", "today", "summary", "https://feed.example", "abc123")
+            )
+            relay.save_output()
+            saved = json.loads(Path(relay.OUTPUT_JSON).read_text(encoding="utf-8"))
+        self.assertEqual(
+            saved,
+            [
+                {
+                    "title": "Title",
+                    "link": "https://example.com/a",
+                    "published": "today",
+                    "summary": "summary",
+                    "source_feed": "https://feed.example",
+                    "article_hash": "abc123",
+                }
+            ],
+        )
+
+    def test_clean_summary_strips_html_and_truncates(self):
+        relay = load_relay_module()
+        html = '<p style="color:red">Patch <b>now</b> &amp; hunt</p><img src="pixel.gif"><script>track()</script>'
+        self.assertEqual(relay.clean_summary(html), "Patch now & hunt")
+        self.assertEqual(relay.clean_summary("x" * 500), "x" * relay.SUMMARY_MAX_CHARS)
+        self.assertEqual(relay.clean_summary(None), "")
+
+    def test_parse_xml_entries_reads_rss_and_atom(self):
+        relay = load_relay_module()
+        rss = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>feed</title>
+<item><title> VPN bug exploited </title><link>https://example.com/vpn</link>
+<pubDate>Tue, 13 Oct 2026 10:00:00 +0000</pubDate>
+<description><![CDATA[<p>Patch <b>now</b></p>]]></description></item>
+</channel></rss>"""
+        atom = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>feed</title>
+<entry><title>Atom story</title>
+<link rel="self" href="https://example.com/self"/><link rel="alternate" href="https://example.com/atom"/>
+<updated>2026-10-13T10:00:00Z</updated><summary type="html">&lt;p&gt;Summary&lt;/p&gt;</summary></entry>
+</feed>"""
+        self.assertEqual(
+            relay._parse_xml_entries(rss),
+            [("VPN bug exploited", "https://example.com/vpn", "Tue, 13 Oct 2026 10:00:00 +0000", "Patch now")],
+        )
+        self.assertEqual(
+            relay._parse_xml_entries(atom),
+            [("Atom story", "https://example.com/atom", "2026-10-13T10:00:00Z", "Summary")],
+        )
+
+    def test_parse_xml_entries_defers_malformed_feeds_to_feedparser(self):
+        relay = load_relay_module()
+        self.assertIsNone(relay._parse_xml_entries(b"<rss><channel><item><title>a &nbsp; b</title></item></channel></rss>"))
+        self.assertIsNone(relay._parse_xml_entries(b"not xml at all"))
+
+    def test_parse_bytes_feedparser_path_drops_entries_without_title_or_link(self):
+        relay = load_relay_module()
+        parsed = types.SimpleNamespace(
+            entries=[
+                {"title": " Kept ", "link": "https://example.com/kept ", "updated": "today", "summary": "<p>Body</p>"},
+                {"title": "No link", "summary": "ignored"},
+                {"title": None, "link": "https://example.com/untitled"},
+            ]
+        )
+        relay.feedparser = types.SimpleNamespace(parse=lambda data: parsed)
+        self.assertEqual(
+            relay._parse_bytes(b"not xml at all"),
+            [("Kept", "https://example.com/kept", "today", "Body")],
+        )
+
+    def test_collect_entries_keeps_feed_order_and_isolates_failures(self):
+        relay = load_relay_module()
+        urls = ["https://a.example/feed", "https://bad.example/feed", "https://c.example/feed"]
+        cached = [("Cached", "https://example.com/1", "today", "summary")]
+
+        def fake_fetch(url, cache=None):
+            if url == "https://bad.example/feed":
+                raise OSError("connection reset")
+            return None, None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            relay.FEED_CACHE_DIR = Path(tmp)
+            relay.TODAY = "2026-06-20"
+            for url in urls:
+                relay.save_feed_cache(url, validators={"etag": '"v1"'}, entries=cached)
+            relay.TODAY = "2026-06-21"
+            relay.fetch_feed = fake_fetch
+            collected = relay.collect_entries(urls)
+
+        self.assertEqual(collected, [(urls[0], cached), (urls[2], cached)])
+
+    def test_collect_entries_reuses_cached_entries_when_not_modified(self):
+        relay = load_relay_module()
+        url = "https://a.example/feed"
+        with tempfile.TemporaryDirectory() as tmp:
+            relay.FEED_CACHE_DIR = Path(tmp)
+            relay.TODAY = "2026-06-20"
+            relay.save_feed_cache(
+                url,
+                validators={"etag": '"v1"', "last_modified": None},
+                entries=[("Cached title", "https://a.example/1", "today", "summary")],
+            )
+            relay.TODAY = "2026-06-21"
+            sent_caches = []
+
+            def fake_fetch(fetch_url, cache=None):
+                sent_caches.append(cache)
+                return None, None
+
+            relay.fetch_feed = fake_fetch
+            collected = relay.collect_entries([url])
+
+        self.assertEqual(sent_caches[0]["etag"], '"v1"')
+        self.assertEqual(
+            collected,
+            [(url, [("Cached title", "https://a.example/1", "today", "summary")])],
+        )
+
+    def test_collect_entries_skips_network_for_feeds_fetched_today(self):
+        relay = load_relay_module()
+        url = "https://a.example/feed"
+        entries = [("Fetched earlier today", "https://a.example/1", "today", "summary")]
+        with tempfile.TemporaryDirectory() as tmp:
+            relay.FEED_CACHE_DIR = Path(tmp)
+            relay.save_feed_cache(url, validators={"etag": '"v1"'}, entries=entries)
+
+            def fail_fetch(fetch_url, cache=None):
+                raise AssertionError("feed should not be re-fetched")
+
+            relay.fetch_feed = fail_fetch
+            self.assertEqual(relay.collect_entries([url]), [(url, entries)])
+
+    def test_run_date_override_is_validated(self):
+        with mock.patch.dict(os.environ, {"HERMES_RUN_DATE": "2026-05-05"}):
+            self.assertEqual(load_relay_module().OUTPUT_JSON, "hermes_signal_2026-05-05.json")
+        with mock.patch.dict(os.environ, {"HERMES_RUN_DATE": "05/05/2026"}):
+            with self.assertRaises(SystemExit) as raised:
+                load_relay_module()
+        self.assertIn("HERMES_RUN_DATE", str(raised.exception))
+
 
 if __name__ == "__main__":
     unittest.main()
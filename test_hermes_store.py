@@ -9,8 +9,14 @@ from hermes_store import (
     article_exists,
     connect,
     import_legacy_signal_files,
+    load_article_scores,
+    load_briefed_stories,
+    load_briefing_blocks,
+    mark_articles_used,
     record_article,
     record_briefing,
+    save_article_scores,
+    save_briefing_blocks,
     stats,
 )
 
@@ -57,6 +63,23 @@ class HermesStoreTests(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_record_article_can_batch_into_one_transaction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                is_new, _ = record_article(conn, title="A", link="https://example.com/a", commit=False)
+                self.assertTrue(is_new)
+                is_new, _ = record_article(conn, title="A", link="https://example.com/a", commit=False)
+                self.assertFalse(is_new)
+                conn.rollback()
+                self.assertEqual(stats(conn)["articles"], 0)
+
+                record_article(conn, title="A", link="https://example.com/a", commit=False)
+                conn.commit()
+                self.assertEqual(stats(conn)["articles"], 1)
+            finally:
+                conn.close()
+
     def test_import_legacy_signal_files_backfills_database(self):
         with tempfile.TemporaryDirectory() as tmp:
             cwd = os.getcwd()
@@ -115,6 +138,104 @@ class HermesStoreTests(unittest.TestCase):
             finally:
                 conn.close()
 
+    def test_mark_articles_used_prefers_persisted_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                _, uid = record_article(conn, title="Original", link="https://example.com/a")
+                # Title/link drifted in the signal file, but the stored hash still matches.
+                mark_articles_used(
+                    conn,
+                    [{"title": "Edited", "link": "https://example.com/moved", "article_hash": uid}],
+                )
+                self.assertEqual(stats(conn)["articles_used_in_briefings"], 1)
+            finally:
+                conn.close()
+
+    def test_stats_counts_used_articles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                self.assertEqual(
+                    stats(conn),
+                    {"articles": 0, "articles_used_in_briefings": 0, "briefings": 0},
+                )
+                record_article(conn, title="One", link="https://example.com/one")
+                record_article(conn, title="Two", link="https://example.com/two")
+                mark_articles_used(conn, [{"title": "Two", "link": "https://example.com/two"}])
+                self.assertEqual(
+                    stats(conn),
+                    {"articles": 2, "articles_used_in_briefings": 1, "briefings": 0},
+                )
+            finally:
+                conn.close()
+
+    def test_briefing_blocks_round_trip_until_title_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                one = {"title": "One", "link": "https://example.com/one"}
+                two = {"title": "Two", "link": "https://example.com/two"}
+                save_briefing_blocks(conn, [(one, "1) One\nScore: 8/10"), (two, "2) Two")])
+                self.assertEqual(
+                    load_briefing_blocks(conn, [one, {"title": "Other", "link": "https://example.com/x"}]),
+                    {"https://example.com/one": "1) One\nScore: 8/10"},
+                )
+                retitled = {"title": "Two (updated)", "link": "https://example.com/two"}
+                self.assertEqual(load_briefing_blocks(conn, [retitled]), {})
+            finally:
+                conn.close()
+
+    def test_article_scores_round_trip_for_unchanged_articles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                one = {"title": "One", "link": "https://example.com/one"}
+                two = {"title": "Two", "link": "https://example.com/two"}
+                save_article_scores(conn, [(one, 8), (two, 4.5)])
+                retitled = {"title": "Two (updated)", "link": "https://example.com/two"}
+                self.assertEqual(load_article_scores(conn, [one, retitled]), {"https://example.com/one": 8.0})
+                self.assertEqual(load_article_scores(conn, [one], max_age_hours=-1), {})
+            finally:
+                conn.close()
+
+    def test_briefing_blocks_keep_first_created_at(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                one = {"title": "One", "link": "https://example.com/one"}
+                save_briefing_blocks(conn, [(one, "first")])
+                conn.execute("UPDATE briefing_blocks SET created_at = '2026-05-04T08:00:00+00:00'")
+                save_briefing_blocks(conn, [(one, "second")])
+                row = conn.execute("SELECT block, created_at FROM briefing_blocks").fetchone()
+                self.assertEqual(tuple(row), ("second", "2026-05-04T08:00:00+00:00"))
+                self.assertEqual(load_briefing_blocks(conn, [one], since="2026-05-05T00:00:00+00:00"), {})
+                self.assertEqual(
+                    load_briefing_blocks(conn, [one], since="2026-05-04T00:00:00+00:00", until="2026-05-05T00:00:00+00:00"),
+                    {"https://example.com/one": "second"},
+                )
+            finally:
+                conn.close()
+
+    def test_briefed_stories_match_links_and_syndicated_titles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(Path(tmp) / "relay.db")
+            try:
+                title = "Acme VPN zero-day exploited to breach government networks"
+                original = {"title": title, "link": "https://a.example/acme"}
+                record_article(conn, title=title, link=original["link"])
+                save_briefing_blocks(conn, [(original, f"1) {title}")])
+                conn.execute("UPDATE briefing_blocks SET created_at = '2026-05-04T08:00:00+00:00'")
+                copy = {"title": title + " now", "link": "https://b.example/acme"}
+                unrelated = {"title": "Acme VPN patch released", "link": "https://c.example/acme"}
+                window = {"since": "2026-04-28T00:00:00+00:00", "until": "2026-05-05T00:00:00+00:00"}
+                briefed = load_briefed_stories(conn, [original, copy, unrelated], threshold=0.85, **window)
+                self.assertEqual(briefed, {"https://a.example/acme": title, "https://b.example/acme": title})
+                later = {"since": "2026-05-05T00:00:00+00:00", "until": "2026-05-06T00:00:00+00:00"}
+                self.assertEqual(load_briefed_stories(conn, [original, copy], **later), {})
+            finally:
+                conn.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,553 @@
+import os
+import smtplib
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "test-project")
+
+import llm_score_and_summarize as llm
+from hermes_json import write_json
+from hermes_store import connect, record_article, save_article_scores, save_briefing_blocks
+
+
+SAMPLE_RESPONSE = """1) Critical VPN flaw exploited in the wild
+Score: 9/10
+Key Takeaways:
+- Attackers chain an auth bypass with RCE on edge devices
+- Patch released **today** for all supported versions
+Angle for this story: **Operational resilience**
+One-Line Board Take: Edge devices are now the front door.
+Article Summary:
+The vendor confirmed **active exploitation**.
+Briefing - Variant A (lead with so-what): Your remote access is your weakest link this week, and the fix is available now.
+Briefing - Variant B (lead with concrete detail): A single crafted request lets an unauthenticated attacker run code on the appliance.
+
+---
+
+Headline: **Cloud misconfig leaks <records>**
+**8.5/10**
+- Bucket left public for months
+- Data included customer PII
+Board-Level Impact:
+Regulators will ask questions.
+
+---
+
+**Bold only headline & more**
+Score: 7
+- A bullet that is long enough
+"""
+
+ARTICLES = [
+    {"title": "Critical VPN flaw exploited in the wild", "link": "https://example.com/vpn"},
+    {"title": "Cloud misconfig leaks <records>", "link": "https://example.com/cloud"},
+    {"title": "Bold only headline & more", "link": "https://example.com/bold"},
+]
+
+
+def content_key(articles):
+    return llm.articles_content_hash(articles, *llm.get_lens_for_date(llm.TODAY))
+
+
+@contextmanager
+def run_directory():
+    """Run in a scratch directory with its own database, like a fresh checkout."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with mock.patch.dict(os.environ, {"HERMES_RELAY_DB": str(Path(tmp) / "relay.db")}):
+                yield Path(tmp)
+        finally:
+            os.chdir(previous)
+
+
+def write_signal(articles):
+    write_json(Path(f"hermes_signal_{llm.today}.json"), articles)
+
+
+def run_main(response=SAMPLE_RESPONSE):
+    """Run main() with the model answering response; returns the call_llm mock."""
+    def fake_call_llm(prompt, on_text=None):
+        if on_text:
+            on_text(response)
+        return response
+
+    with mock.patch.object(llm, "call_llm", side_effect=fake_call_llm) as call_llm, \
+            mock.patch.object(llm, "configure_logging"), \
+            mock.patch.object(llm, "prewarm_client"), \
+            mock.patch.object(llm, "send_email", return_value=False):
+        llm.main()
+    return call_llm
+
+
+class FakeSMTP:
+    def __init__(self, alive=True, disconnect_on_send=False):
+        self.alive = alive
+        self.disconnect_on_send = disconnect_on_send
+        self.sent = []
+        self.closed = False
+
+    def noop(self):
+        if not self.alive:
+            raise smtplib.SMTPServerDisconnected("gone")
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if self.disconnect_on_send:
+            raise smtplib.SMTPServerDisconnected("dropped")
+        self.sent.append(msg)
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class BriefingRendererTests(unittest.TestCase):
+    def test_streamed_chunks_render_like_the_whole_response(self):
+        expected = llm.format_email_html(SAMPLE_RESPONSE, ARTICLES, lens_name="Resilience")
+        for text in (SAMPLE_RESPONSE, SAMPLE_RESPONSE.replace("\n", "\r\n")):
+            for size in (1, 2, 7, 64):
+                renderer = llm.BriefingRenderer(ARTICLES, lens_name="Resilience")
+                for start in range(0, len(text), size):
+                    renderer.feed(text[start:start + size])
+                self.assertEqual(renderer.finish(text), expected)
+                self.assertEqual(renderer.article_count, 3)
+
+    def test_finish_rerenders_a_replayed_stream(self):
+        renderer = llm.BriefingRenderer(ARTICLES)
+        # A failed first attempt, then the retried stream from the start
+        renderer.feed(SAMPLE_RESPONSE[:200])
+        renderer.feed(SAMPLE_RESPONSE)
+        self.assertEqual(renderer.finish(SAMPLE_RESPONSE), llm.format_email_html(SAMPLE_RESPONSE, ARTICLES))
+        self.assertEqual([link for link, _ in renderer.blocks], [a["link"] for a in ARTICLES])
+
+    def test_headline_matching_prefers_exact_titles(self):
+        index = llm.HeadlineIndex([
+            {"title": "Critical VPN Bug Now Exploited in the Wild", "link": "https://example.com/vpn"},
+            {"title": "Critical VPN Bugs Patched by Vendor", "link": "https://example.com/patch"},
+            {"title": "Ransomware Gang Leaks Hospital Data", "link": "https://example.com/ransom"},
+        ])
+        self.assertEqual(index.resolve("critical vpn bug now exploited in the wild!"), ("https://example.com/vpn", True))
+        self.assertEqual(index.resolve("Ransomware Gangs Leak Hospital Data"), ("https://example.com/ransom", False))
+        # Two titles clear the cutoff: no guess
+        self.assertEqual(index.resolve("Critical VPN Bugs Exploited by Vendor"), (None, False))
+
+    def test_fuzzy_matched_blocks_are_not_cached(self):
+        articles = [dict(ARTICLES[0], title="Critical VPN flaws exploited in wild"), *ARTICLES[1:]]
+        renderer = llm.BriefingRenderer(articles)
+        renderer.feed(SAMPLE_RESPONSE)
+        html = renderer.finish()
+        self.assertIn('href="https://example.com/vpn"', html)
+        self.assertEqual([link for link, _ in renderer.blocks], [a["link"] for a in ARTICLES[1:]])
+
+    def test_article_text_is_escaped(self):
+        html = llm.format_email_html(SAMPLE_RESPONSE, ARTICLES)
+        self.assertIn("Cloud misconfig leaks &lt;records&gt;", html)
+        self.assertIn("Bold only headline &amp; more", html)
+        self.assertNotIn("<records>", html)
+
+    def test_only_web_links_become_anchors(self):
+        for link in ("javascript:alert(1)", "JavaScript:alert(1)", "data:text/html,<b>x</b>", "/relative/path", "example.com/vpn"):
+            html = llm.format_email_html(SAMPLE_RESPONSE, [dict(ARTICLES[0], link=link)])
+            self.assertIn("<h2>Critical VPN flaw exploited in the wild</h2>", html, link)
+            self.assertNotIn("<a href", html, link)
+        for link in ("http://example.com/vpn", "HTTPS://example.com/vpn"):
+            html = llm.format_email_html(SAMPLE_RESPONSE, [dict(ARTICLES[0], link=link)])
+            self.assertIn(f'<a href="{link}" class="link"', html)
+
+
+class ParseSectionTests(unittest.TestCase):
+    def sections(self):
+        return SAMPLE_RESPONSE.split("\n---\n")
+
+    def test_full_section_is_sliced_by_label(self):
+        fields = llm._parse_section(self.sections()[0])
+        self.assertEqual(fields["score"], "9")
+        self.assertEqual(fields["takeaways"].split(), "- Attackers chain an auth bypass with RCE on edge devices "
+                         "- Patch released **today** for all supported versions".split())
+        self.assertEqual(fields["angle"], "**Operational resilience**")
+        self.assertEqual(fields["one_liner"], "Edge devices are now the front door.")
+        self.assertEqual(fields["summary"], "The vendor confirmed **active exploitation**.")
+        # The numbered headline line is not part of any field
+        self.assertTrue(fields["variant_a"].startswith("Your remote access"))
+        self.assertTrue(fields["variant_b"].endswith("on the appliance."))
+        self.assertIsNone(fields["legacy_briefing"])
+
+    def test_missing_labels_leave_fields_empty(self):
+        fields = llm._parse_section("2. Vendor patches router bug\nScore: 6/10\nKey Takeaway - patch now\nOne-Line Board Take:\n")
+        self.assertEqual(fields["score"], "6")
+        # A label without its colon, or with nothing after it, is not a field
+        self.assertIsNone(fields["takeaways"])
+        self.assertIsNone(fields["one_liner"])
+        self.assertEqual(set(fields.values()) - {"6"}, {None})
+
+    def test_section_without_article_summary_uses_board_impact(self):
+        fields = llm._parse_section(self.sections()[1])
+        self.assertEqual((fields["score"], fields["summary"]), ("8.5", "Regulators will ask questions."))
+        self.assertIsNone(fields["variant_a"])
+        legacy = llm._parse_section("1) Old format\nBriefing Paragraph: Written the old way.\n")
+        self.assertEqual(legacy["legacy_briefing"], "Written the old way.")
+
+
+class PromptRowTests(unittest.TestCase):
+    def test_prompt_summary_collapses_and_caps_text(self):
+        self.assertEqual(llm.prompt_summary({"title": "T", "summary": "  Patch\n\tnow  "}), "Patch now")
+        long = {"title": "T", "summary": "word " * 200}
+        summary = llm.prompt_summary(long)
+        self.assertTrue(summary.endswith("word…"))
+        self.assertLessEqual(len(summary), llm.PROMPT_SUMMARY_MAX_CHARS + 1)
+        # Short summaries are kept whole
+        self.assertEqual(llm.prompt_summary({"title": "T", "summary": "x" * llm.PROMPT_SUMMARY_MAX_CHARS}),
+                         "x" * llm.PROMPT_SUMMARY_MAX_CHARS)
+
+    def test_rows_leave_out_empty_and_repeated_summaries(self):
+        articles = [
+            {"title": "Kept", "summary": "Details", "link": "https://example.com/a", "published": "today"},
+            {"title": "Same  title", "summary": "Same title"},
+            {"title": "Empty"},
+        ]
+        rows = llm.articles_prompt_json(articles)
+        self.assertNotIn("\n", rows)
+        self.assertEqual(llm.loads_json(rows),
+                         [{"i": 0, "t": "Kept", "s": "Details"}, {"i": 1, "t": "Same  title"}, {"i": 2, "t": "Empty"}])
+
+    def test_only_the_scoring_prompt_numbers_its_rows(self):
+        self.assertEqual(llm.loads_json(llm.articles_prompt_json(ARTICLES[:1], indexed=False)),
+                         [{"t": ARTICLES[0]["title"]}])
+        briefing = llm.build_prompt(ARTICLES, "Resilience", "Lens text")
+        self.assertIn(llm.articles_prompt_json(ARTICLES, indexed=False), briefing)
+        self.assertNotIn("example.com", briefing)
+        self.assertIn(llm.articles_prompt_json(ARTICLES), llm.build_shortlist_prompt(ARTICLES))
+
+
+class RecentArticlesTests(unittest.TestCase):
+    NOW = datetime(2026, 5, 5, 12, tzinfo=timezone.utc)
+
+    def test_parse_published_reads_rss_and_atom_dates(self):
+        self.assertEqual(llm.parse_published("Tue, 05 May 2026 10:00:00 GMT"), datetime(2026, 5, 5, 10, tzinfo=timezone.utc))
+        self.assertEqual(llm.parse_published("2026-05-05T10:00:00Z"), datetime(2026, 5, 5, 10, tzinfo=timezone.utc))
+        # Naive timestamps are taken as UTC
+        self.assertEqual(llm.parse_published("2026-05-05 10:00:00").tzinfo, timezone.utc)
+        for value in (None, "", "yesterday"):
+            self.assertIsNone(llm.parse_published(value))
+
+    def test_old_articles_are_dropped(self):
+        fresh = {"title": "Fresh", "published": "2026-05-04T12:00:00+00:00"}
+        undated = {"title": "Undated", "published": "sometime"}
+        old = {"title": "Old", "published": "2026-05-03T11:59:00+00:00"}
+        self.assertEqual(llm.filter_recent_articles([fresh, old, undated], now=self.NOW), [fresh, undated])
+
+    def test_all_articles_are_kept_when_none_is_recent(self):
+        old = [{"title": "Old", "published": "2026-04-01T00:00:00+00:00"}]
+        self.assertEqual(llm.filter_recent_articles(old, now=self.NOW), old)
+
+    def test_age_is_measured_from_the_run_date(self):
+        articles = [{"title": "Fresh", "published": "2026-05-04T12:00:00+00:00"},
+                    {"title": "Old", "published": "2026-04-01T00:00:00+00:00"}]
+        # A backfill for 5 May run long after that day still sees 4 May as recent
+        with mock.patch.object(llm, "TODAY", date(2026, 5, 5)):
+            self.assertEqual(llm.filter_recent_articles(articles), articles[:1])
+
+
+class ShortlistTests(unittest.TestCase):
+    def test_parse_shortlist_keeps_only_valid_entries(self):
+        text = '```json\n{"scores": {"0": 7, "1": "high", "2": true, "3": 4.5, "x": 9, "9": 9}}\n```'
+        self.assertEqual(llm.parse_shortlist(text, 4), {0: 7.0, 3: 4.5})
+
+    def test_select_shortlist_keeps_failed_chunks_whole(self):
+        chunks = [["a0", "a1", "a2"], ["b0", "b1"], ["c0", "c1"]]
+        chunk_scores = [{0: 2, 1: 9, 2: 5}, None, {0: 8, 1: 1}]
+        self.assertEqual(llm.select_shortlist(chunks, chunk_scores, 2), ["a1", "b0", "b1", "c0"])
+
+    def test_only_unscored_articles_reach_the_model(self):
+        with run_directory():
+            with connect() as conn:
+                save_article_scores(conn, [(ARTICLES[0], 8)])
+            with mock.patch.object(llm, "score_chunk", side_effect=lambda chunk: {i: 5 for i in range(len(chunk))}) as score_chunk:
+                chunks, chunk_scores = llm.score_articles(ARTICLES)
+            score_chunk.assert_called_once_with(ARTICLES[1:])
+            self.assertEqual(chunks, [ARTICLES[1:], ARTICLES[:1]])
+            self.assertEqual(chunk_scores, [{0: 5, 1: 5}, {0: 8}])
+            # The rerun finds every score saved
+            with mock.patch.object(llm, "score_chunk") as score_chunk:
+                llm.score_articles(ARTICLES)
+            score_chunk.assert_not_called()
+
+    def test_shortlist_is_capped_at_shortlist_max(self):
+        articles = [{"title": f"Story {n}", "link": f"https://example.com/{n}"} for n in range(10)]
+        # Stories 3-6 score highest; 7-9 sit in later chunks but score low
+        scores = {a["link"]: n % 7 + n / 10 for n, a in enumerate(articles)}
+        with run_directory(), \
+                mock.patch.object(llm, "SCORING_CHUNK_SIZE", 2), mock.patch.object(llm, "SHORTLIST_MAX", 4), \
+                mock.patch.object(llm, "score_chunk", side_effect=lambda chunk: {i: scores[a["link"]] for i, a in enumerate(chunk)}):
+            shortlisted = llm.shortlist_articles(articles)
+        # Five chunks would allow 15 picks; the cap keeps the best four, in signal order
+        self.assertEqual([a["title"] for a in shortlisted], ["Story 3", "Story 4", "Story 5", "Story 6"])
+
+
+class PlanBriefingTests(unittest.TestCase):
+    SCORES = {"Alpha": 9, "Bravo": 3, "Charlie": 2, "Delta": 10, "Echo": 1}
+
+    def articles(self, *titles):
+        return [{"title": title, "link": f"https://example.com/{title.lower()}"} for title in titles]
+
+    def plan(self, articles, cached, scorer=None):
+        with connect() as conn:
+            save_briefing_blocks(conn, [(article, f"1) {article['title']}") for article in cached])
+        scorer = scorer or (lambda chunk: {i: self.SCORES[a["title"]] for i, a in enumerate(chunk)})
+        # Blocks saved just now belong to the run date's earlier runs
+        with mock.patch.object(llm, "score_chunk", side_effect=scorer), \
+                mock.patch.object(llm, "TODAY", datetime.now(timezone.utc).date()):
+            return llm.plan_briefing(articles)
+
+    def test_cached_blocks_only_fill_slots_their_articles_win(self):
+        with run_directory():
+            articles = self.articles("Alpha", "Bravo", "Charlie", "Delta", "Echo")
+            reused, candidates, top_n = self.plan(articles, articles[:3])
+            # Delta is new and leads, Charlie's cached block lost its place
+            self.assertEqual(reused, ["1) Alpha", "1) Bravo"])
+            self.assertEqual([a["title"] for a in candidates], ["Charlie", "Delta", "Echo"])
+            self.assertEqual(top_n, 1)
+
+    def test_all_cached_leaders_skip_the_llm(self):
+        with run_directory():
+            articles = self.articles("Alpha", "Bravo", "Charlie", "Echo")
+            reused, _, top_n = self.plan(articles, articles)
+            self.assertEqual(reused, ["1) Alpha", "1) Bravo", "1) Charlie"])
+            self.assertEqual(top_n, 0)
+
+    def test_stories_briefed_on_earlier_days_are_dropped(self):
+        with run_directory(), mock.patch.object(llm, "TODAY", date(2026, 5, 5)):
+            title = "Acme VPN zero-day exploited to breach government networks"
+            yesterday = {"title": title, "link": "https://a.example/acme"}
+            with connect() as conn:
+                record_article(conn, title=title, link=yesterday["link"])
+                save_briefing_blocks(conn, [(yesterday, f"1) {title}")])
+                conn.execute("UPDATE briefing_blocks SET created_at = '2026-05-04T08:00:00+00:00'")
+            mirror = {"title": title, "link": "https://mirror.example/copy"}
+            self.assertEqual(llm.drop_briefed_stories([mirror, yesterday, *ARTICLES]), ARTICLES)
+            with connect() as conn:
+                # A week later the story may come back
+                conn.execute("UPDATE briefing_blocks SET created_at = '2026-04-27T08:00:00+00:00'")
+            self.assertEqual(len(llm.drop_briefed_stories([mirror, *ARTICLES])), 4)
+
+    def test_no_block_is_reused_without_a_ranking(self):
+        with run_directory():
+            articles = self.articles("Alpha", "Bravo", "Charlie", "Delta")
+            reused, candidates, top_n = self.plan(articles, articles, scorer=lambda chunk: None)
+            self.assertEqual((reused, len(candidates), top_n), ([], 4, 3))
+
+
+class RetryTests(unittest.TestCase):
+    def error(self, code=None, headers=None):
+        error = RuntimeError("vertex")
+        error.code = code
+        error.response = SimpleNamespace(headers=headers or {})
+        return error
+
+    def test_retry_delay_honors_retry_after(self):
+        self.assertEqual(llm.llm_retry_delay(self.error(429, {"Retry-After": "7"}), 0), 7.0)
+        self.assertEqual(llm.llm_retry_delay(self.error(429, {"Retry-After": "999"}), 0), llm.LLM_RETRY_MAX_SECONDS)
+
+    def test_retry_delay_backs_off_without_retry_after(self):
+        error = self.error(503, {"Retry-After": "soon"})
+        self.assertEqual([llm.llm_retry_delay(error, attempt) for attempt in range(3)], [1.0, 2.0, 4.0])
+        self.assertEqual(llm.llm_retry_delay(error, 20), llm.LLM_RETRY_MAX_SECONDS)
+
+    def test_only_transient_errors_are_retried(self):
+        self.assertTrue(llm.is_retryable_llm_error(self.error(429)))
+        self.assertTrue(llm.is_retryable_llm_error(ConnectionResetError()))
+        self.assertFalse(llm.is_retryable_llm_error(self.error(400)))
+        self.assertFalse(llm.is_retryable_llm_error(ValueError("bad prompt")))
+
+    def test_rate_limiter_spaces_request_starts(self):
+        limiter = llm.RateLimiter(60)
+        with mock.patch.object(llm.time, "monotonic", return_value=100.0), \
+                mock.patch.object(llm.time, "sleep") as sleep:
+            for _ in range(3):
+                limiter.acquire()
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1.0, 2.0])
+
+
+class SMTPClientTests(unittest.TestCase):
+    def client(self, *servers):
+        client = llm.SMTPClient("smtp.example.com", 587, "me@example.com", "secret")
+        client._connect = mock.Mock(side_effect=list(servers))
+        return client
+
+    def test_session_is_reused_across_sends(self):
+        server = FakeSMTP()
+        client = self.client(server)
+        client.send_message("one")
+        client.send_message("two")
+        self.assertEqual(server.sent, ["one", "two"])
+        self.assertEqual(client._connect.call_count, 1)
+
+    def test_dropped_session_is_reopened(self):
+        stale, fresh = FakeSMTP(), FakeSMTP()
+        client = self.client(stale, fresh)
+        client.send_message("one")
+        stale.alive = False
+        client.send_message("two")
+        self.assertEqual(fresh.sent, ["two"])
+        self.assertTrue(stale.closed)
+
+    def test_connections_use_the_timeout(self):
+        client = llm.SMTPClient("smtp.example.com", 587, "me@example.com", "secret", timeout=5)
+        with mock.patch("smtplib.SMTP") as smtp:
+            client._connect()
+        smtp.assert_called_once_with("smtp.example.com", 587, timeout=5)
+
+    def test_hung_warm_up_is_abandoned(self):
+        release = threading.Event()
+        late = FakeSMTP()
+        client = llm.SMTPClient("smtp.example.com", 587, "me@example.com", "secret", timeout=0.05)
+        client._connect = mock.Mock(side_effect=lambda: release.wait() and late)
+        client.warm_up()
+        warmup = client._warmup
+        client._finish_warm_up()
+        self.assertIsNone(client._server)
+        release.set()
+        warmup.join(1)
+        # The session that showed up after the wait was closed, not kept
+        self.assertIsNone(client._server)
+        self.assertTrue(late.closed)
+
+    def test_disconnect_during_send_retries_once(self):
+        broken, fresh = FakeSMTP(disconnect_on_send=True), FakeSMTP()
+        client = self.client(broken, fresh)
+        client.send_message("one")
+        self.assertEqual(fresh.sent, ["one"])
+
+
+class SendEmailTests(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("ICLOUD_EMAIL", "me@example.com"), ("ICLOUD_PASSWORD", "secret"),
+                            ("EMAIL_RECIPIENT", "board@example.com")):
+            patcher = mock.patch.object(llm, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_message_has_headers_and_an_html_alternative(self):
+        server = FakeSMTP()
+        self.assertTrue(llm.send_email("<p>Briefing</p>", subject="Hermes", smtp=server))
+        (msg,) = server.sent
+        self.assertEqual(msg["Subject"], f"Hermes - {llm.TODAY_HUMAN}")
+        self.assertEqual((msg["From"], msg["To"]), ("me@example.com", "board@example.com"))
+        self.assertEqual(msg.get_content_type(), "multipart/alternative")
+        plain, html = msg.iter_parts()
+        self.assertEqual(plain.get_content_type(), "text/plain")
+        self.assertEqual(html.get_content_type(), "text/html")
+        self.assertEqual(html.get_content().strip(), "<p>Briefing</p>")
+
+    def test_a_passed_connection_is_used_instead_of_the_shared_one(self):
+        server = FakeSMTP()
+        with mock.patch.object(llm, "smtp_client") as shared:
+            self.assertTrue(llm.send_email("<p>Briefing</p>", smtp=server))
+        shared.send_message.assert_not_called()
+        self.assertEqual(len(server.sent), 1)
+        with mock.patch.object(llm, "smtp_client") as shared:
+            self.assertTrue(llm.send_email("<p>Briefing</p>"))
+        shared.send_message.assert_called_once()
+
+
+class LoggingTests(unittest.TestCase):
+    def test_unknown_log_level_falls_back_to_info(self):
+        with mock.patch.object(llm, "LOG_LEVEL", "LOUD"), mock.patch.object(llm.logging, "basicConfig") as basic, \
+                self.assertLogs(llm.log, "WARNING") as logs:
+            llm.configure_logging()
+        self.assertEqual(basic.call_args.kwargs["level"], "INFO")
+        self.assertEqual(logs.output, ["WARNING:hermes:unknown LOG_LEVEL 'LOUD'; using INFO."])
+
+    def test_known_log_level_is_used(self):
+        with mock.patch.object(llm, "LOG_LEVEL", "DEBUG"), mock.patch.object(llm.logging, "basicConfig") as basic:
+            llm.configure_logging()
+        self.assertEqual(basic.call_args.kwargs["level"], "DEBUG")
+
+
+class MainTests(unittest.TestCase):
+    def test_html_newer_than_the_signal_is_resent_as_is(self):
+        with run_directory():
+            llm.OUTPUT_DIR.mkdir(parents=True)
+            write_signal(ARTICLES)
+            os.utime(f"hermes_signal_{llm.today}.json", (0, 0))
+            html_file = llm.OUTPUT_DIR / f"hermes_briefing_{llm.today}.html"
+            html_file.write_text("<p>Sent earlier</p>", encoding="utf-8")
+            with mock.patch.object(llm, "call_llm") as call_llm, \
+                    mock.patch.object(llm, "read_json_array") as read_signal, \
+                    mock.patch.object(llm, "configure_logging"), \
+                    mock.patch.object(llm, "send_email", return_value=True) as send_email:
+                llm.main()
+            send_email.assert_called_once_with("<p>Sent earlier</p>")
+            call_llm.assert_not_called()
+            # The signal file is not even parsed
+            read_signal.assert_not_called()
+
+    def test_error_payload_is_not_taken_for_a_briefing(self):
+        with run_directory():
+            llm.OUTPUT_DIR.mkdir(parents=True)
+            write_signal(ARTICLES)
+            os.utime(f"hermes_signal_{llm.today}.json", (0, 0))
+            # What a failed run before the error file existed left behind
+            write_json(llm.OUTPUT_FILE, {"error": "LLM request failed", "response": "quota"})
+            run_main().assert_called_once()
+            self.assertIn("top_articles", llm.read_json(llm.OUTPUT_FILE))
+
+
+class CacheTests(unittest.TestCase):
+    def test_recent_llm_result_expires(self):
+        with run_directory():
+            content_hash = content_key(ARTICLES)
+            self.assertIsNone(llm.load_recent_llm_result(content_hash))
+            llm.save_llm_result(content_hash, "Resilience", SAMPLE_RESPONSE)
+            self.assertEqual(llm.load_recent_llm_result(content_hash)["top_articles"], SAMPLE_RESPONSE)
+            stale = time.time() - (llm.LLM_CACHE_TTL_HOURS + 1) * 3600
+            os.utime(llm._llm_cache_path(content_hash), (stale, stale))
+            self.assertIsNone(llm.load_recent_llm_result(content_hash))
+
+    def test_main_reuses_a_recent_llm_result(self):
+        with run_directory():
+            write_signal(ARTICLES)
+            llm.save_llm_result(content_key(ARTICLES), "Resilience", SAMPLE_RESPONSE)
+            call_llm = run_main()
+            call_llm.assert_not_called()
+            self.assertIn("Critical VPN flaw", llm.OUTPUT_DIR.joinpath(f"hermes_briefing_{llm.today}.html").read_text())
+
+    def test_main_calls_the_llm_when_the_articles_changed(self):
+        with run_directory():
+            write_signal(ARTICLES)
+            llm.save_llm_result(content_key(ARTICLES[:2]), "Resilience", "stale briefing")
+            call_llm = run_main()
+            call_llm.assert_called_once()
+            self.assertEqual(llm.read_json(llm.OUTPUT_FILE)["top_articles"], SAMPLE_RESPONSE)
+
+    def test_saved_briefing_only_matches_the_same_articles(self):
+        with run_directory():
+            llm.OUTPUT_DIR.mkdir(parents=True)
+            content_hash = content_key(ARTICLES)
+            write_json(llm.OUTPUT_FILE, {"content_hash": content_hash, "top_articles": SAMPLE_RESPONSE})
+            self.assertIsNotNone(llm.load_cached_briefing(content_key(list(reversed(ARTICLES)))))
+            self.assertIsNone(llm.load_cached_briefing(content_key(ARTICLES[:2])))
+
+    def test_cache_key_covers_lens_prompt_and_date(self):
+        key = content_key(ARTICLES)
+        lens_name, lens_description = llm.get_lens_for_date(llm.TODAY)
+        self.assertNotEqual(llm.articles_content_hash(ARTICLES, "Other lens", lens_description), key)
+        with mock.patch.object(llm, "PROMPT_VERSION", "edited"):
+            self.assertNotEqual(content_key(ARTICLES), key)
+        with mock.patch.object(llm, "today", "2000-01-01"):
+            self.assertNotEqual(content_key(ARTICLES), key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import types
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from subprocess import CompletedProcess
+from unittest import mock
+
+fake_dotenv = types.ModuleType("dotenv")
+setattr(fake_dotenv, "load_dotenv", lambda *args, **kwargs: False)
+sys.modules.setdefault("dotenv", fake_dotenv)
+
+import orchestrator
+
+
+def completed(returncode=0):
+    return CompletedProcess(args=[], returncode=returncode)
+
+
+class OrchestratorTests(unittest.TestCase):
+    def test_scripts_run_unbuffered_with_this_interpreter(self):
+        with mock.patch.object(orchestrator.subprocess, "run", return_value=completed()) as run, \
+                redirect_stdout(StringIO()):
+            orchestrator.run_script("hermes-relay.py")
+        run.assert_called_once_with([sys.executable, "-u", "hermes-relay.py"])
+
+    def test_failed_script_stops_the_pipeline(self):
+        with mock.patch.object(orchestrator.subprocess, "run", return_value=completed(2)), \
+                redirect_stdout(StringIO()) as out:
+            with self.assertRaises(SystemExit) as raised:
+                orchestrator.run_script("hermes-relay.py")
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn("failed with exit code 2", out.getvalue())
+
+    def test_main_pins_the_run_date_without_overriding_it(self):
+        env = {"GOOGLE_CLOUD_PROJECT": "test-project", "HERMES_RUN_DATE": "2026-05-04"}
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(orchestrator.subprocess, "run", return_value=completed()) as run, \
+                redirect_stdout(StringIO()):
+            orchestrator.main()
+            self.assertEqual(os.environ["HERMES_RUN_DATE"], "2026-05-04")
+        self.assertEqual([c.args[0][-1] for c in run.call_args_list], ["hermes-relay.py", "llm_score_and_summarize.py"])
+
+    def test_main_sets_the_run_date_when_unset(self):
+        with mock.patch.dict(os.environ, {"GOOGLE_CLOUD_PROJECT": "test-project"}), \
+                mock.patch.object(orchestrator.subprocess, "run", return_value=completed()), \
+                redirect_stdout(StringIO()):
+            os.environ.pop("HERMES_RUN_DATE", None)
+            orchestrator.main()
+            self.assertRegex(os.environ["HERMES_RUN_DATE"], r"^\d{4}-\d{2}-\d{2}$")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,8 @@ from publish_blog_post import (
     build_markdown,
     build_editor_prompt,
     choose_top_article,
+    find_latest_briefing_json,
+    find_source_url,
     main,
     parse_model_fallbacks,
     parse_articles,
@@ -69,6 +71,16 @@ class PublishBlogPostTests(unittest.TestCase):
         self.assertIsNotNone(selected.board_take)
         self.assertIn("incident-response", selected.board_take or "")
 
+    def test_find_source_url_tolerates_reworded_headline(self):
+        articles = [
+            {"title": "Critical VPN Bug Now Exploited in the Wild", "link": "https://example.com/vpn"},
+            {"title": "Ransomware Gang Leaks Hospital Data", "link": "https://example.com/ransom"},
+        ]
+        self.assertEqual(find_source_url("Critical VPN Bugs Now Exploited In Wild", articles), "https://example.com/vpn")
+        self.assertIsNone(find_source_url("Quarterly Patch Roundup", articles))
+        articles.append({"title": "Critical VPN Bugs Now Exploited In Asia", "link": "https://example.com/asia"})
+        self.assertIsNone(find_source_url("Critical VPN Bugs Now Exploited In Wild", articles))
+
     def test_split_frontmatter_keeps_schema_separate_from_editor_body(self):
         markdown = '---\ntitle: "A"\npublishDate: "2026-06-20"\n---\n\nBody text'
         frontmatter, body = split_frontmatter(markdown)
@@ -111,6 +123,18 @@ class PublishBlogPostTests(unittest.TestCase):
     def test_parse_model_fallbacks_accepts_comma_separated_models(self):
         self.assertEqual(parse_model_fallbacks("gemini-3.5-flash, gemini-2.5-pro"), ["gemini-3.5-flash", "gemini-2.5-pro"])
 
+    def test_find_latest_briefing_json_picks_newest_date(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for day in ["2026-06-19", "2026-06-21", "2026-06-20"]:
+                day_dir = root / "json_output" / day
+                day_dir.mkdir(parents=True)
+                (day_dir / f"hermes_llm_top3_{day}.json").write_text("{}", encoding="utf-8")
+            latest = find_latest_briefing_json(root)
+            self.assertEqual(latest.name, "hermes_llm_top3_2026-06-21.json")
+            with self.assertRaises(FileNotFoundError):
+                find_latest_briefing_json(root / "missing")
+
     def test_main_writes_schema_compatible_astro_markdown(self):
         with tempfile.TemporaryDirectory() as tmp:
             root = Path(tmp)